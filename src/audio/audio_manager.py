@@ -1,4 +1,6 @@
 from utils.settings import *
+from audio.sound_bank import sound_bank
+from utils.tracing import traced
 
 class AudioManager:
     def __init__(self, default_volume=0.5):
@@ -6,20 +8,47 @@ class AudioManager:
         pygame.mixer.init()
         self.default_volume = default_volume
         self.sounds = {
-            'jump': pygame.mixer.Sound(join('..', 'assets', 'sounds', 'player-jump.ogg')),
-            'next_level': pygame.mixer.Sound(join('..', 'assets', 'sounds', 'portal-jump.wav')),
-            'dash': pygame.mixer.Sound(join('..', 'assets', 'sounds', 'dash.wav')),
-            'death': pygame.mixer.Sound(join('..', 'assets', 'sounds', 'death.ogg')),
-            'respawn': pygame.mixer.Sound(join('..', 'assets', 'sounds', 'respawn.ogg')),
-            'bg_music': pygame.mixer.Sound(join('..', 'assets', 'sounds', 'bg_music.mp3')),
+            'jump': join('..', 'assets', 'sounds', 'player-jump.ogg'),
+            'next_level': join('..', 'assets', 'sounds', 'portal-jump.wav'),
+            'dash': join('..', 'assets', 'sounds', 'dash.wav'),
+            'death': join('..', 'assets', 'sounds', 'death.ogg'),
+            'respawn': join('..', 'assets', 'sounds', 'respawn.ogg'),
         }
+
+        # Rarely played sounds are only decoded the first time they are played
+        self.lazy_sounds = {'respawn'}
+
+        # The decoded sounds are shared with the other audio managers through the sound bank
+        for sound_name, path in self.sounds.items():
+            sound_bank.acquire(path, lazy=sound_name in self.lazy_sounds)
+
+        # Volumes are applied to the channels this manager plays on, so they don't leak into the other managers
+        self.channels = {}
         self.volumes = {key: self.default_volume for key in self.sounds}
         self.apply_volumes()
 
+    def close(self):
+        """
+        Release this manager's sounds from the sound bank. Sounds still playing are left to finish
+        ( e.g. the portal sound of the level that loaded the next planet ).
+        """
+        for path in self.sounds.values():
+            sound_bank.release(path)
+        self.sounds = {}
+
+    def get_channel(self, sound_name):
+        """The channel the sound was last played on by this manager, if it is still playing it."""
+        channel = self.channels.get(sound_name)
+        if channel is not None and channel.get_sound() is sound_bank.get(self.sounds[sound_name]):
+            return channel
+        return None
+
     def apply_volumes(self):
         """Apply the current volume settings to all sounds."""
-        for sound_name, sound in self.sounds.items():
-            sound.set_volume(self.volumes[sound_name])
+        for sound_name in self.sounds:
+            channel = self.get_channel(sound_name)
+            if channel is not None:
+                channel.set_volume(self.volumes[sound_name])
 
     def set_sound_volume(self, sound_name, volume):
         """
@@ -30,7 +59,9 @@ class AudioManager:
         if sound_name in self.sounds:
             # Clamp volume between 0 and 1
             self.volumes[sound_name] = max(0.0, min(VOLUME, 1.0))
-            self.sounds[sound_name].set_volume(self.volumes[sound_name])
+            channel = self.get_channel(sound_name)
+            if channel is not None:
+                channel.set_volume(self.volumes[sound_name])
         else:
             print(f"Sound '{sound_name}' not found.")
 
@@ -44,16 +75,22 @@ class AudioManager:
             self.volumes[sound_name] = self.default_volume
         self.apply_volumes()
 
+    @traced("AudioManager.play")
     def play(self, sound_name, loop=0):
         """Play a sound by name. Optionally loop."""
         if sound_name in self.sounds:
-            self.sounds[sound_name].play(loops=loop)
+            channel = sound_bank.get(self.sounds[sound_name]).play(loops=loop)
+            if channel is not None:
+                channel.set_volume(self.volumes[sound_name])
+                self.channels[sound_name] = channel
         else:
             print(f"Sound '{sound_name}' not found.")
 
     def stop(self, sound_name):
         """Stop a sound by name."""
         if sound_name in self.sounds:
-            self.sounds[sound_name].stop()
+            channel = self.get_channel(sound_name)
+            if channel is not None:
+                channel.stop()
         else:
             print(f"Sound '{sound_name}' not found.")
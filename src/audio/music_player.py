@@ -0,0 +1,95 @@
+from utils.settings import *
+
+# Posted by pygame.mixer.music when a track finishes ( the main loop hands it to the music player )
+MUSIC_END = pygame.USEREVENT + 1
+
+class MusicPlayer:
+    def __init__(self, fade_time = 1500, volume = VOLUME):
+        """
+        Stream background music from disk with pygame.mixer.music, so tracks are never fully decoded in memory.
+
+        :param fade_time: Duration of the fade between two track lists, in milliseconds.
+        :param volume: Starting music volume ( the settings menu changes it afterwards ).
+        """
+        pygame.mixer.init()
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.set_endevent(MUSIC_END)
+        self.fade_time = fade_time
+        self.tracks = []
+        self.track_index = 0
+        self.pending_tracks = None
+        # Stopping the music ourselves posts MUSIC_END too, which may only be handled once the next list started
+        self.ignore_end = False
+
+    def play(self, tracks):
+        """
+        Switch to a track list. Whatever is playing fades out first and the new list fades in.
+        Asking for the list that is already playing does nothing, so the music carries on between levels.
+
+        :param tracks: Paths of the tracks, played in order and looped.
+        """
+        tracks = list(tracks)
+        if tracks == self.tracks and self.pending_tracks is None:
+            return
+
+        if pygame.mixer.music.get_busy() and self.tracks:
+            # The new list starts in update(), once the fade out is over
+            self.pending_tracks = tracks
+            self.ignore_end = True
+            pygame.mixer.music.fadeout(self.fade_time)
+        else:
+            self.start(tracks)
+
+    def start(self, tracks):
+        self.tracks = tracks
+        self.track_index = 0
+        self.pending_tracks = None
+        if not tracks:
+            pygame.mixer.music.stop()
+            return
+
+        try:
+            pygame.mixer.music.load(tracks[0])
+        except pygame.error:
+            print(f"Music '{tracks[0]}' could not be loaded.")
+            return
+
+        if len(tracks) == 1:
+            # A single track is looped by the mixer itself, without a gap
+            pygame.mixer.music.play(loops=-1, fade_ms=self.fade_time)
+        else:
+            pygame.mixer.music.play(fade_ms=self.fade_time)
+            self.queue_next()
+
+    # Queue the track after the current one, so the mixer moves on to it without a gap
+    def queue_next(self):
+        next_index = (self.track_index + 1) % len(self.tracks)
+        pygame.mixer.music.queue(self.tracks[next_index])
+
+    def track_ended(self):
+        """Called on MUSIC_END. The queued track is now playing, queue the one after it."""
+        if self.ignore_end:
+            self.ignore_end = False
+            return
+        if self.pending_tracks is not None or len(self.tracks) < 2:
+            return
+        self.track_index = (self.track_index + 1) % len(self.tracks)
+        self.queue_next()
+
+    def stop(self):
+        self.tracks = []
+        self.pending_tracks = None
+        self.ignore_end = pygame.mixer.music.get_busy()
+        pygame.mixer.music.stop()
+
+    def update(self):
+        # Fade out finished, fade the new track list in
+        if self.pending_tracks is not None and not pygame.mixer.music.get_busy():
+            self.start(self.pending_tracks)
+        # The queue ran dry ( a MUSIC_END event got lost while a menu was reading the events ), carry on
+        # A single track loops by itself, so it only stops if it can't be played at all
+        elif len(self.tracks) > 1 and not pygame.mixer.music.get_busy():
+            self.track_index = (self.track_index + 1) % len(self.tracks)
+            pygame.mixer.music.load(self.tracks[self.track_index])
+            pygame.mixer.music.play()
+            self.queue_next()
@@ -0,0 +1,55 @@
+from os.path import normpath
+from utils.settings import *
+
+class SoundBank:
+    def __init__(self):
+        """
+        Decode every sound file once and share the same pygame Sound between all audio managers.
+        Sounds are reference counted and freed once no audio manager holds them anymore.
+        """
+        self.entries = {}
+        self.decodes = 0
+
+    def acquire(self, path, lazy = False):
+        """
+        Take a reference to a sound file.
+
+        :param path: Path of the sound file.
+        :param lazy: Decode the file on its first play instead of now ( for rarely used sounds ).
+        """
+        key = normpath(path)
+        entry = self.entries.setdefault(key, {"sound": None, "references": 0})
+        entry["references"] += 1
+        if not lazy:
+            self.get(path)
+
+    def release(self, path):
+        """
+        Drop a reference to a sound file, freeing the sound once nobody uses it.
+        A sound still playing isn't cut off, the channel playing it keeps it alive until it ends.
+        """
+        key = normpath(path)
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        entry["references"] -= 1
+        if entry["references"] <= 0:
+            del self.entries[key]
+
+    def get(self, path):
+        """The decoded sound of an acquired file, decoding it if this is the first use."""
+        entry = self.entries[normpath(path)]
+        if entry["sound"] is None:
+            entry["sound"] = pygame.mixer.Sound(path)
+            self.decodes += 1
+        return entry["sound"]
+
+    def stats(self):
+        return {
+            "sounds": len(self.entries),
+            "decoded": sum(1 for entry in self.entries.values() if entry["sound"] is not None),
+            "decodes": self.decodes,
+        }
+
+# Shared by every audio manager
+sound_bank = SoundBank()
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import math
+import argparse
+import platform
+from contextlib import redirect_stdout
+
+# Keep stdout for the JSON report
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from utils.settings import *
+from utils.scripted_input import RandomInput
+from utils.input_recording import InputRecording, InputReplay
+from headless import HeadlessRunner
+
+# What is timed, per frame. Methods called several times in a frame ( Player.collision ) are summed
+TIMED = ("all_sprites.update", "all_sprites.draw", "player.collision", "player.check_contact", "level.draw_permissions")
+
+def percentile(sorted_samples, percent):
+    # Nearest rank
+    if not sorted_samples:
+        return 0
+    rank = math.ceil(percent / 100 * len(sorted_samples))
+    return sorted_samples[max(0, min(len(sorted_samples), rank) - 1)]
+
+class LevelBenchmark:
+    def __init__(self, runner, planet_index, level_index):
+        """
+        Time the parts of the game loop on one level. The level is loaded on the runner and instrumented:
+        each timed method is wrapped on its instance, so nothing changes for the rest of the game.
+
+        :param runner: HeadlessRunner to load the level on.
+        :param planet_index: Planet of the level.
+        :param level_index: Level of the planet.
+        """
+        self.runner = runner
+        self.planet_index = planet_index
+        self.level_index = level_index
+
+        runner.level_manager.load_save_info({"current_planet_index": planet_index, "current_level_index": level_index})
+        self.level = runner.level_manager.current_level
+
+        # Stay on this level: touching the flag sends the player back to the spawn instead of loading the next level
+        self.level.callback = self.level.player.respawn_player
+
+        # Nanoseconds spent in each timed method during the current frame, and the totals of every frame
+        self.frame_times = {name: 0 for name in TIMED}
+        self.samples = {name: [] for name in TIMED + ("frame",)}
+
+        self.wrap(self.level.all_sprites, "update", "all_sprites.update")
+        self.wrap(self.level.all_sprites, "draw", "all_sprites.draw")
+        self.wrap(self.level.player, "collision", "player.collision")
+        self.wrap(self.level.player, "check_contact", "player.check_contact")
+        self.wrap(self.level, "draw_permissions", "level.draw_permissions")
+
+    def wrap(self, obj, method_name, name):
+        method = getattr(obj, method_name)
+        frame_times = self.frame_times
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            result = method(*args, **kwargs)
+            frame_times[name] += time.perf_counter_ns() - start
+            return result
+
+        setattr(obj, method_name, timed)
+
+    def run(self, frames, script, warmup = 60):
+        """
+        Step and draw the level, one frame per simulation step.
+
+        :param frames: Number of measured frames.
+        :param script: ScriptedInput driving the player.
+        :param warmup: Frames run before measuring, to fill the caches.
+        """
+        for frame in range(warmup + frames):
+            for name in TIMED:
+                self.frame_times[name] = 0
+
+            start = time.perf_counter_ns()
+            self.runner.step(script)
+            self.level.draw()
+            frame_time = time.perf_counter_ns() - start
+
+            if frame >= warmup:
+                for name in TIMED:
+                    self.samples[name].append(self.frame_times[name])
+                self.samples["frame"].append(frame_time)
+
+    def report(self):
+        timings = {}
+        for name, samples in self.samples.items():
+            samples = sorted(samples)
+            timings[name] = {
+                "p50": percentile(samples, 50) / 1e6,
+                "p95": percentile(samples, 95) / 1e6,
+                "p99": percentile(samples, 99) / 1e6,
+                "mean": sum(samples) / len(samples) / 1e6 if samples else 0,
+            }
+        return {
+            "planet": self.planet_index,
+            "level": self.level_index,
+            "tmx_map": self.runner.level_manager.catalog.level(self.planet_index, self.level_index)["tmx_map"],
+            "sprites": len(self.level.all_sprites),
+            "timings_ms": timings,
+        }
+
+def benchmark_levels(frames, warmup = 60, seed = 0, recording = None):
+    """
+    Benchmark every level of the catalog with random input, or only the level of a recording with its input.
+
+    :return: The report of each level.
+    """
+    runner = HeadlessRunner()
+
+    if recording is not None:
+        levels = [(recording.planet_index, recording.level_index)]
+        frames = min(frames, max(0, len(recording) - warmup))
+    else:
+        catalog = runner.level_manager.catalog
+        levels = [(planet_index, level_index) for planet_index in range(len(catalog))
+                  for level_index in range(len(catalog.planet(planet_index)["levels"]))]
+
+    results = []
+    for planet_index, level_index in levels:
+        benchmark = LevelBenchmark(runner, planet_index, level_index)
+        script = InputReplay(recording) if recording is not None else RandomInput(seed)
+
+        # Every level starts its input script from the first frame
+        runner.frame = 0
+        benchmark.run(frames, script, warmup)
+        results.append(benchmark.report())
+    return results
+
+# Example: python benchmark.py --frames 1200 --output baseline.json
+#          python benchmark.py --replay session.rec ( only the recorded level, with the recorded input )
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the game loop on every level and report p50 / p95 / p99 as JSON.")
+    parser.add_argument("--frames", type=int, default=600, help="measured frames per level")
+    parser.add_argument("--warmup", type=int, default=60, help="frames run before measuring")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random input")
+    parser.add_argument("--replay", help="benchmark the level of this input recording, with its input")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    recording = InputRecording.load(args.replay) if args.replay else None
+
+    # The game prints while loading levels, keep it out of the report
+    with redirect_stdout(sys.stderr):
+        results = benchmark_levels(args.frames, args.warmup, args.seed, recording)
+
+    report = {
+        "frames": args.frames,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "replay": args.replay,
+        "timestep": SIMULATION_STEP,
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "levels": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent = 4)
+    else:
+        json.dump(report, sys.stdout, indent = 4)
+        print()
@@ -1,12 +1,25 @@
 from utils.settings import *
+from utils.assets import assets
 from utils.timer import *
+from ui.perfhud import perf_hud
+
+# Rows of the player's sprite sheet ( animation name, number of frames )
+PLAYER_ANIMATIONS = (
+    ("idle", 8),
+    ("run", 8),
+    ("attack_1", 4),
+    ("attack_2", 3),
+    ("jump", 4),
+    ("fall", 4),
+    ("hit", 2),
+    ("death", 14),
+)
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, pos, groups, collision_sprites, planet, permissions, notify_level_callback, audio_manager):
-        super().__init__(groups)
-
-        # Rendering
+    def __init__(self, pos, groups, collision_sprites, occupancy, planet, permissions, notify_level_callback, audio_manager):
+        # Rendering ( the layer has to be known before joining all_sprites )
         self.z = Z_LAYERS['main']
+        super().__init__(groups)
 
         # Audio manager
         self.audio_manager = audio_manager
@@ -17,10 +30,11 @@ class Player(pygame.sprite.Sprite):
         self.audio_manager.set_sound_volume("death", 0.3)
 
         # Player Animations
-        self.sprite_sheet = pygame.image.load("../assets/graphics/tilesets/animated_player.png").convert_alpha()
+        self.sprite_sheet = "../assets/graphics/tilesets/animated_player.png"
         self.frame_width = 64
         self.frame_height = 64
-        self.animations = self.load_animations()
+        self.atlas = self.load_animations()
+        self.animations = self.atlas["right"]
         self.current_animation = 'idle'
         self.current_frame = 0
         self.animation_speed = 0.1
@@ -29,6 +43,7 @@ class Player(pygame.sprite.Sprite):
         # Player State
         self.alive = True
         self.spawn_pos = pos
+        self.respawns = 0
         self.image = self.animations[self.current_animation][self.current_frame]
         self.rect = self.image.get_rect(topleft=pos)
         self.facing_right = True
@@ -75,12 +90,16 @@ class Player(pygame.sprite.Sprite):
 
         # Collision handling
         self.collision_sprites = collision_sprites
+        self.occupancy = occupancy
         self.on_surface = {"ground": False, "left": False, "right": False}
         self.platform = None
 
         # Permissions
         self.permissions = permissions
 
+        # Where the pressed keys come from ( headless runs swap in scripted keys )
+        self.get_pressed = pygame.key.get_pressed
+
         # Timers
         self.timers = {
             "wall jump": Timer(400),
@@ -92,28 +111,8 @@ class Player(pygame.sprite.Sprite):
         }
 
     def load_animations(self):
-        """Extract individual frames from the sprite sheet and store them."""
-        animations = {
-            'idle': ([], 8),
-            'run': ([], 8),
-            "attack_1": ([], 4),
-            "attack_2": ([], 3),
-            "jump": ([], 4),
-            "fall": ([], 4),
-            "hit": ([], 2),
-            "death": ([], 14),
-        }
-
-        # Adjust the coordinates and sizes based on your sprite sheet
-        for row, (animation_name, (frames, frame_count)) in enumerate(animations.items()):
-            for col in range(frame_count):
-                x = col * self.frame_width
-                y = row * self.frame_height
-                frame = self.sprite_sheet.subsurface(pygame.Rect(x, y, self.frame_width, self.frame_height))
-                frames.append(frame)
-            animations[animation_name] = frames
-
-        return animations
+        """Right and left facing frames of every animation, sliced once and shared by all players."""
+        return assets.animations(self.sprite_sheet, (self.frame_width, self.frame_height), PLAYER_ANIMATIONS)
     
     def draw_afterimages(self, surface, offset):
         """Draw the player's afterimages."""
@@ -183,21 +182,16 @@ class Player(pygame.sprite.Sprite):
             self.animation_timer = 0
             self.current_frame = (self.current_frame + 1) % len(self.animations[self.current_animation])
 
-        # Always use the original frame from the animation list
-        original_image = self.animations[self.current_animation][self.current_frame]
-
-        # Flip the image if the player is facing left
-        if not self.facing_right:
-            self.image = pygame.transform.flip(original_image, True, False)
-        else:
-            self.image = original_image
+        # Left facing frames are mirrored in advance, so nothing is flipped per frame
+        facing = "right" if self.facing_right else "left"
+        self.image = self.atlas[facing][self.current_animation][self.current_frame]
     
     def set_notify_callback(self, callback):
         self.notify_mode = callback
 
     # Handle input
     def handle_input(self):
-        keys = pygame.key.get_pressed()
+        keys = self.get_pressed()
         input_vector = vector(0, 0)
 
         # Don't allow left and right input while the "wall jump" timer is active
@@ -337,7 +331,8 @@ class Player(pygame.sprite.Sprite):
         right_rect = pygame.Rect(self.hitbox_rect.topright + vector(0, self.hitbox_rect.height / 4), (2, self.hitbox_rect.height / 2))
         left_rect = pygame.Rect((self.hitbox_rect.topleft + vector(-2, self.hitbox_rect.height / 4)), (2, self.hitbox_rect.height / 2))
 
-        collide_rects = [sprite.rect for sprite in self.collision_sprites]
+        # Static geometry is looked up in the level's occupancy grid, only the moving platforms are tested one by one
+        moving_rects = [sprite.rect for sprite in self.collision_sprites.moving_sprites]
 
         self.on_surface["ground"] = False
         self.on_surface["right"] = False
@@ -345,25 +340,29 @@ class Player(pygame.sprite.Sprite):
 
         # Track if the player is on a platform
         self.platform = None
-        for sprite in [sprite for sprite in self.collision_sprites.sprites() if hasattr(sprite, "moving")]:
+        for sprite in self.collision_sprites.moving_sprites:
             if sprite.rect.colliderect(ground_rect):
                 self.platform = sprite
                 self.on_surface["ground"] = True
 
         # Ground detection for non-moving surfaces
-        if self.platform is None and ground_rect.collidelist(collide_rects) >= 0:
+        if self.platform is None and self.occupancy.overlaps(ground_rect):
             self.on_surface["ground"] = True
 
         # Check for wall collisions
-        if right_rect.collidelist(collide_rects) >= 0:
+        if self.occupancy.overlaps(right_rect) or right_rect.collidelist(moving_rects) >= 0:
             self.on_surface["right"] = True
 
-        if left_rect.collidelist(collide_rects) >= 0:
+        if self.occupancy.overlaps(left_rect) or left_rect.collidelist(moving_rects) >= 0:
             self.on_surface["left"] = True
 
     # Check collisions between player and anything else
     def collision(self, axis):
-        for sprite in self.collision_sprites:
+        start = time.perf_counter()
+
+        # Only the sprites in the grid cells swept by the hitbox this frame can be hit
+        swept_rect = self.hitbox_rect.union(self.prev_rect)
+        for sprite in self.collision_sprites.query(swept_rect):
             if sprite.rect.colliderect(self.hitbox_rect):
                 # Check collision on x axis
                 if axis == "x":
@@ -397,11 +396,15 @@ class Player(pygame.sprite.Sprite):
                     # Set flag to False
                     self.alive = False
 
+        perf_hud.add("collision", (time.perf_counter() - start) * 1000)
+
     # If the player takes damage or falls off the map, respawn him at the original coordinates
     def respawn_player(self):
         # Reset player position
         self.hitbox_rect.topleft = self.spawn_pos
         self.rect.center = self.hitbox_rect.center
+        # Teleport, so the renderer doesn't slide the player back to the spawn
+        self.prev_rect = self.hitbox_rect.copy()
         self.facing_right = True
 
         # Reset animation
@@ -416,6 +419,7 @@ class Player(pygame.sprite.Sprite):
 
         # Set alive state
         self.alive = True
+        self.respawns += 1
 
         # Reset environment and physics
         self.on_surface = {"ground": False, "left": False, "right": False}
@@ -439,6 +443,8 @@ class Player(pygame.sprite.Sprite):
     # Update state
     def update(self, dt):
         update_timers(self)
+        # Where the player was before this step, for the collisions and the renderer ( also while dying )
+        self.prev_rect = self.hitbox_rect.copy()
 
         if self.hitbox_rect.bottom > SCREEN_HEIGHT + 2 * TILE_SIZE:
                 self.respawn_player()
@@ -448,7 +454,6 @@ class Player(pygame.sprite.Sprite):
                 self.respawn_player()
                 return
         else:
-            self.prev_rect = self.hitbox_rect.copy()
             self.handle_input()
             self.handle_player_movement(dt)
             self.check_contact()
@@ -0,0 +1,126 @@
+import os
+import argparse
+import hashlib
+from utils.settings import *
+from utils import timer
+from utils.scripted_input import HeldInput, RandomInput
+from utils.input_recording import InputRecording, InputRecorder, InputReplay
+from levels.level_manager import LevelManager
+
+class HeadlessRunner:
+    def __init__(self, planet_index = 0, level_index = 0):
+        """
+        Run levels without a display, for regression and physics checks.
+        SDL runs on its dummy drivers, nothing is drawn and the timers run on simulated time,
+        so the steps run as fast as the CPU allows and always behave the same.
+
+        :param planet_index: Planet to start on.
+        :param level_index: Level of the planet to start on.
+        """
+        # Has to be set before pygame opens the display and the mixer
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+        pygame.init()
+
+        # Images are still converted when a level loads, which needs a display mode, even a dummy one
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+        # Simulated time, in milliseconds
+        self.ticks = 0
+        timer.set_clock(lambda: int(self.ticks))
+
+        self.level_manager = LevelManager(self.screen, pygame.time.Clock())
+        if (planet_index, level_index) != (0, 0):
+            self.level_manager.load_save_info({"current_planet_index": planet_index, "current_level_index": level_index})
+
+        self.frame = 0
+
+    def step(self, script):
+        """Run one simulation step, with the keys the script presses on this frame. Returns False if the level was completed."""
+        script.advance(self.frame)
+        level = self.level_manager.current_level
+        level.player.get_pressed = script.get_pressed
+
+        self.ticks += SIMULATION_STEP * 1000
+        self.frame += 1
+        return level.update(SIMULATION_STEP)
+
+    def run(self, frames, script):
+        """
+        Run a number of simulation steps.
+
+        :param frames: Number of steps to run.
+        :param script: ScriptedInput pressing the keys.
+        :return: Stats of the run, with a hash of the player's trajectory to compare runs with.
+        """
+        trajectory = hashlib.md5()
+        deaths = 0
+        levels_completed = 0
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            player = self.level_manager.current_level.player
+            respawns = player.respawns
+            if not self.step(script):
+                levels_completed += 1
+
+            # Dying and falling off the map both end in a respawn
+            deaths += player.respawns - respawns
+
+            player = self.level_manager.current_level.player
+            trajectory.update(repr((player.hitbox_rect.topleft, player.alive, tuple(player.on_surface.values()))).encode())
+        elapsed = time.perf_counter() - start
+
+        return {
+            "frames": frames,
+            "seconds": elapsed,
+            "frames_per_second": frames / elapsed if elapsed else 0,
+            "planet": self.level_manager.current_planet_index,
+            "level": self.level_manager.current_level_index,
+            "levels_completed": levels_completed,
+            "deaths": deaths,
+            "player": tuple(self.level_manager.current_level.player.hitbox_rect),
+            "trajectory": trajectory.hexdigest(),
+        }
+
+# Example: python headless.py --planet 0 --level 2 --frames 20000 --seed 3
+#          python headless.py --keys right,up
+#          python headless.py --seed 3 --record run.rec, then python headless.py --replay run.rec
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run levels without a display, as fast as possible.")
+    parser.add_argument("--planet", type=int, default=0, help="planet to start on")
+    parser.add_argument("--level", type=int, default=0, help="level of the planet to start on")
+    parser.add_argument("--frames", type=int, help="number of simulation steps to run ( default: 10000, or the whole replay )")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random input")
+    parser.add_argument("--keys", help="comma separated keys to hold instead of random input, e.g. right,up")
+    parser.add_argument("--record", help="save the input of the run to this file")
+    parser.add_argument("--replay", help="replay the input saved in this file, from the level it was recorded on")
+    args = parser.parse_args()
+
+    planet_index, level_index = args.planet, args.level
+    if args.replay:
+        recording = InputRecording.load(args.replay)
+        if recording.timestep != SIMULATION_STEP:
+            print(f"Warning: recorded with a {recording.timestep:.5f}s timestep, replaying with {SIMULATION_STEP:.5f}s")
+        planet_index, level_index = recording.planet_index, recording.level_index
+        script = InputReplay(recording)
+        frames = args.frames or len(recording)
+    else:
+        if args.keys:
+            script = HeldInput(pygame.key.key_code(name.strip()) for name in args.keys.split(","))
+        else:
+            script = RandomInput(args.seed)
+        frames = args.frames or 10000
+
+    if args.record:
+        recording = InputRecording(planet_index, level_index)
+        script = InputRecorder(recording, script)
+
+    runner = HeadlessRunner(planet_index, level_index)
+    stats = runner.run(frames, script)
+
+    if args.record:
+        recording.save(args.record)
+        print(f"Recorded {len(recording)} steps in {len(recording.runs())} runs to '{args.record}'")
+    for name, value in stats.items():
+        print(f"{name}: {value}")
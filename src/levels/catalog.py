@@ -0,0 +1,52 @@
+import json
+from os.path import join, exists
+
+class PlanetCatalog:
+    def __init__(self, root_path = join("..", "levels")):
+        """
+        Index of every planet and level of the game, read once at startup.
+        Planet i is described by root_path/planet_i/planet_config.json, planets are numbered from 0 without gaps.
+
+        :param root_path: Directory holding the planet directories.
+        """
+        self.root_path = root_path
+        self.planets = []
+        self.scan()
+
+    def __len__(self):
+        return len(self.planets)
+
+    def scan(self):
+        self.planets = []
+        while True:
+            planet_path = join(self.root_path, f"planet_{len(self.planets)}")
+            config_path = join(planet_path, "planet_config.json")
+            if not exists(config_path):
+                break
+
+            with open(config_path, "r") as file:
+                data = json.load(file)
+
+            # Resolve the paths once, everything else reads them from here
+            levels = [dict(level, tmx_path = join(planet_path, level["tmx_map"])) for level in data["levels"]]
+            self.planets.append({
+                "name": data["name"],
+                "gravity_strength": data["gravity_strength"],
+                "music": [join("..", "assets", "sounds", track) for track in data.get("music", ["bg_music.mp3"])],
+                "root_path": planet_path,
+                "levels": levels,
+            })
+
+    def planet(self, planet_index):
+        return self.planets[planet_index]
+
+    def level(self, planet_index, level_index):
+        return self.planets[planet_index]["levels"][level_index]
+
+    def next_level(self, planet_index, level_index):
+        """(planet index, level index) of the level after the given one, None after the last level of the last planet."""
+        if level_index < len(self.planets[planet_index]["levels"]) - 1:
+            return planet_index, level_index + 1
+        if planet_index + 1 < len(self.planets):
+            return planet_index + 1, 0
+        return None
@@ -1,9 +1,12 @@
 from utils.settings import *
+from utils.assets import assets
 
 class Flag(pygame.sprite.Sprite):
     def __init__(self, pos, groups, collision_sprites):
+        # Drawn on the background layer, behind the terrain
+        self.z = Z_LAYERS['bg']
         super().__init__(groups)
-        self.image = image.load("../assets/graphics/tilesets/flag.png")
+        self.image = assets.image("../assets/graphics/tilesets/flag.png")
 
         self.rect = self.image.get_rect(topleft = pos)
         self.prev_rect = self.rect.copy()
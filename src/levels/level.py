@@ -1,9 +1,14 @@
 from utils.settings import *
-from sprites.sprite import Sprite, MovingSprite
+from utils.assets import assets
+from sprites.sprite import MovingSprite, Collider
 from entities.player import Player
 from levels.flag import Flag
-from sprites.groups import AllSprites
+from sprites.groups import AllSprites, CollisionSprites
+from levels.occupancy import OccupancyGrid, SOLID, HAZARD
+from levels.triggers import TriggerZones
 from utils.timer import Timer
+from utils.tracing import traced
+from ui.perfhud import perf_hud
 
 class Level:
     def __init__(self, level_data, callback):
@@ -17,20 +22,17 @@ class Level:
         # Level sound ( Each planet has an audio_manager instance, so if we want, we can use a different set of sounds )
         self.audio_manager = level_data["planet"].audio_manager
 
-        # Level sound flags
-        self.bg_music_playing = False
-
         # Level allowed abilities images
         self.permission_images = {
-            "dash": image.load("../assets/graphics/ui/dash.png").convert_alpha(),
-            "heavy_mode": image.load("../assets/graphics/ui/heavy_mode.png").convert_alpha(),
-            "light_mode": image.load("../assets/graphics/ui/light_mode.png").convert_alpha(),
+            "dash": assets.image("../assets/graphics/ui/dash.png"),
+            "heavy_mode": assets.image("../assets/graphics/ui/heavy_mode.png"),
+            "light_mode": assets.image("../assets/graphics/ui/light_mode.png"),
         }
 
         self.permission_images_used = {
-            "dash": image.load("../assets/graphics/ui/dash_used.png").convert_alpha(),
-            "heavy_mode": image.load("../assets/graphics/ui/heavy_mode_used.png").convert_alpha(),
-            "light_mode": image.load("../assets/graphics/ui/light_mode_used.png").convert_alpha(),
+            "dash": assets.image("../assets/graphics/ui/dash_used.png"),
+            "heavy_mode": assets.image("../assets/graphics/ui/heavy_mode_used.png"),
+            "light_mode": assets.image("../assets/graphics/ui/light_mode_used.png"),
         }
 
         self.permission_timers = {
@@ -44,7 +46,13 @@ class Level:
 
         # Initialize sprite groups
         self.all_sprites = AllSprites(self.tmx_map)
-        self.collision_sprites = pygame.sprite.Group()
+        self.collision_sprites = CollisionSprites()
+
+        # Solid / hazard tiles of the static geometry, used by the player's contact probes
+        self.occupancy = OccupancyGrid(self.tmx_map.width, self.tmx_map.height)
+
+        # Zones showing tutorial hints when the player walks into them
+        self.triggers = TriggerZones(self.tmx_map)
 
         # Initialize level flags
         self.player = None
@@ -75,26 +83,37 @@ class Level:
                 x_offset += active_image.get_width() + 10
 
     # Setup the level by creating the sprites of the objects in each layer and initializing flags
+    @traced("Level.setup")
     def setup(self):
+        # Static tiles only fill the occupancy grid. They are drawn from chunks baked by all_sprites
+        # and collide through the merged rects built from the grid
+        terrain_tiles = []
+
         # Terrain Layer
         try:
             terrain_layer = self.tmx_map.get_layer_by_name("Terrain")
-            z = Z_LAYERS["main"]
             for pos_x, pos_y, surf in terrain_layer.tiles():
-                Sprite((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf, (self.all_sprites, self.collision_sprites), z)
+                self.occupancy.mark(pygame.Rect((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf.get_size()), SOLID)
+                terrain_tiles.append(((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf))
         except ValueError:
             print("Layer 'Terrain' not found.")
         
         # Damage Tiles Layer
         try:
             damage_terrain_layer = self.tmx_map.get_layer_by_name("Damage_Terrain")
-            z = Z_LAYERS["main"]
             for pos_x, pos_y, surf in damage_terrain_layer.tiles():
-                damage_sprite = Sprite((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf,(self.all_sprites, self.collision_sprites))
-                damage_sprite.damage = True
+                self.occupancy.mark(pygame.Rect((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf.get_size()), HAZARD)
+                terrain_tiles.append(((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf))
         except ValueError:
             print("Layer 'Damage_Terrain' not found.")
 
+        # One collider per merged rect of solid or hazard tiles
+        for rect, value in self.occupancy.merged_rects():
+            Collider(rect, self.collision_sprites, damage = value == HAZARD)
+
+        # Bake the terrain before anything else joins the main layer, so it stays underneath
+        self.all_sprites.bake_chunks(terrain_tiles, Z_LAYERS["main"])
+
         # Moving Objects Layer
         try:
             moving_objects_layer = self.tmx_map.get_layer_by_name("Moving Objects")
@@ -123,7 +142,7 @@ class Level:
             for obj in objects_layer:
                 if obj.name == "player":
                     # Create the player
-                    self.player = Player((obj.x, obj.y), self.all_sprites, self.collision_sprites, self.planet,
+                    self.player = Player((obj.x, obj.y), self.all_sprites, self.collision_sprites, self.occupancy, self.planet,
                                          self.permissions, self.notify, self.audio_manager)
                 if obj.name == "flag":
                     # Create the flag
@@ -137,10 +156,11 @@ class Level:
         try:
             decorations_layer = self.tmx_map.get_layer_by_name("Decorations")
             z = Z_LAYERS["fg"]
-            for pos_x, pos_y, surf in decorations_layer.tiles():
-                Sprite((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf, self.all_sprites, z)
+            decoration_tiles = [((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf) for pos_x, pos_y, surf in decorations_layer.tiles()]
+            self.all_sprites.bake_chunks(decoration_tiles, z)
         except ValueError:
             print("Layer 'Decorations' not found.")
+
     # Constraining the player to the map size
     def check_constraint(self):
         if self.player.hitbox_rect.left <= 0:
@@ -148,26 +168,28 @@ class Level:
         if self.player.hitbox_rect.right > self.tmx_map.width * TILE_SIZE - TILE_SIZE:
             self.player.hitbox_rect.left = self.tmx_map.width * TILE_SIZE - 2 * TILE_SIZE
 
-    # Run the level
-    def run(self, dt):
-        self.screen.fill(BLACK)
+    # Advance the level by one simulation step
+    @traced("Level.update")
+    def update(self, dt):
         self.all_sprites.update(dt)
-        self.all_sprites.draw(self.player.hitbox_rect.center)
         self.check_constraint()
-        self.draw_permissions()
-
-        # Play background music if not already playing
-        if not self.bg_music_playing:
-            self.audio_manager.set_sound_volume("bg_music", 0.1)
-            self.audio_manager.play('bg_music', loop=-1)
-            self.bg_music_playing = True
 
         # Check if the level has been completed. If it was, play audio and go to the next level
         if self.flag.check_collision(self.player):
-            self.audio_manager.stop("bg_music")
             self.audio_manager.set_sound_volume("next_level", 0.5)
             self.audio_manager.play("next_level")
             self.callback()
             return False
     
-        return True
\ No newline at end of file
+        return True
+
+    # Draw the level. Alpha is how far the frame is between the last two simulation steps
+    @traced("Level.draw")
+    def draw(self, alpha = 1):
+        self.screen.fill(BLACK)
+
+        # The camera follows the interpolated player, not the simulated one, or the player would jitter on screen
+        player_pos = self.all_sprites.render_pos(self.player, alpha) + vector(self.player.rect.size) / 2
+        self.all_sprites.draw(player_pos, alpha)
+        self.draw_permissions()
+        perf_hud.draw(self.screen, self)
\ No newline at end of file
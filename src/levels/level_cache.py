@@ -0,0 +1,191 @@
+import copyreg
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+from array import array
+from os.path import join, normpath, splitext, exists
+import pytmx  # type: ignore
+from pytmx import TiledMap  # type: ignore
+from utils.tracing import traced
+
+# Compiled levels are kept next to the levels themselves
+CACHE_DIR = join("..", "levels", ".cache")
+
+# Bump when the layout of a compiled level changes
+CACHE_VERSION = 1
+
+# magic, version, source mtime ( ns ), source size, source sha1, length of the pickled map
+HEADER = struct.Struct("<4sHqq20sQ")
+MAGIC = b"SRLC"
+
+# pytmx elements answer unknown attributes from their properties, which breaks the default unpickling.
+# Rebuild them straight from their __dict__ instead
+def restore_element(element, state):
+    element.__dict__.update(state)
+
+def reduce_element(element):
+    # Object groups are lists of their objects
+    items = iter(element) if isinstance(element, list) else None
+    return (copyreg.__newobj__, (type(element),), element.__dict__, items, None, restore_element)
+
+for element_class in (TiledMap, pytmx.TiledTileset, pytmx.TiledTileLayer, pytmx.TiledObjectGroup,
+                      pytmx.TiledObject, pytmx.TiledImageLayer):
+    copyreg.pickle(element_class, reduce_element)
+
+def cache_path(tmx_path):
+    # ../levels/planet_1/level_0.tmx -> planet_1_level_0.lvl
+    planet, level = normpath(tmx_path).split(os.sep)[-2:]
+    return join(CACHE_DIR, f"{planet}_{splitext(level)[0]}.lvl")
+
+def file_hash(path):
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).digest()
+
+@traced("compile_level")
+def compile_level(tmx_path):
+    """
+    Parse a TMX file and store it in the cache, in a compact form that loads without touching the XML.
+    The gids of the tile layers are stored as raw arrays after the pickled map, so they can be memory mapped.
+
+    :param tmx_path: Path of the TMX file.
+    :return: The parsed map, without images.
+    """
+    tmx_map = TiledMap(tmx_path)
+    stat = os.stat(tmx_path)
+
+    # Images are loaded again on the main thread, with the real image loader
+    tmx_map.images = []
+
+    # Pull the gids out of the tile layers, they go after the pickle
+    blobs = []
+    layer_data = {}
+    for layer in tmx_map.layers:
+        if isinstance(layer, pytmx.TiledTileLayer):
+            gids = array("I", (gid for row in layer.data for gid in row))
+            layer_data[layer] = layer.data
+            layer.data = None
+            blobs.append(gids)
+    try:
+        record = pickle.dumps(tmx_map, protocol = pickle.HIGHEST_PROTOCOL)
+    finally:
+        for layer, data in layer_data.items():
+            layer.data = data
+
+    header = HEADER.pack(MAGIC, CACHE_VERSION, stat.st_mtime_ns, stat.st_size, file_hash(tmx_path), len(record))
+    # Pad so the gid arrays start on a 4 byte boundary
+    padding = -(len(header) + len(record)) % 4
+
+    # Write to a temporary file first, a half written cache must never be read ( the prefetch thread compiles too )
+    path = cache_path(tmx_path)
+    # One per writer, the main thread and the prefetch thread can compile the same level at once
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok = True)
+        with open(temp_path, "wb") as file:
+            file.write(header)
+            file.write(record)
+            file.write(bytes(padding))
+            for gids in blobs:
+                gids.tofile(file)
+        os.replace(temp_path, path)
+    except OSError as error:
+        # The game still runs without the cache ( e.g. read-only install, or the old file is still mapped on Windows )
+        print(f"Could not cache level '{tmx_path}': {error}")
+        if exists(temp_path):
+            os.remove(temp_path)
+
+    return tmx_map
+
+# Record the new mtime of a TMX file whose content didn't change, so the next load doesn't hash it again
+def restamp(path, stat, digest, record_size):
+    try:
+        with open(path, "r+b") as file:
+            file.write(HEADER.pack(MAGIC, CACHE_VERSION, stat.st_mtime_ns, stat.st_size, digest, record_size))
+    except OSError:
+        pass
+
+@traced("read_cached_level")
+def read_cached_level(tmx_path):
+    """The cached map of a TMX file, or None if there is no cache or it is out of date."""
+    path = cache_path(tmx_path)
+    if not exists(path):
+        return None
+
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        magic, version, mtime_ns, size, digest, record_size = HEADER.unpack(header)
+        if magic != MAGIC or version != CACHE_VERSION:
+            return None
+
+        # Same mtime and size: up to date. Otherwise the file might only have been touched ( e.g. a git checkout ),
+        # so compare the hashes before giving up on the cache
+        stat = os.stat(tmx_path)
+        if (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+            if size != stat.st_size or digest != file_hash(tmx_path):
+                return None
+            restamp(path, stat, digest, record_size)
+
+        buffer = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+    # A cache that can't be read back ( e.g. written by another version of the game ) is simply compiled again
+    try:
+        tmx_map = pickle.loads(buffer[HEADER.size:HEADER.size + record_size])
+    except Exception:
+        return None
+
+    # The rows of the tile layers are views into the mapped file, nothing is copied
+    offset = HEADER.size + record_size + (-(HEADER.size + record_size) % 4)
+    gids = memoryview(buffer)[offset:].cast("I")
+    start = 0
+    for layer in tmx_map.layers:
+        if isinstance(layer, pytmx.TiledTileLayer):
+            layer.data = [gids[start + row * layer.width:start + (row + 1) * layer.width] for row in range(layer.height)]
+            start += layer.width * layer.height
+
+    return tmx_map
+
+def load_level_map(tmx_path):
+    """
+    Load a TMX file through the level cache, compiling it if the cache is missing or out of date.
+    The returned map has no images yet, see TiledMap.reload_images.
+
+    :param tmx_path: Path of the TMX file.
+    """
+    tmx_map = read_cached_level(tmx_path)
+    if tmx_map is None:
+        tmx_map = compile_level(tmx_path)
+    return tmx_map
+
+# Compile every level and report the cold ( TMX ) and warm ( cache ) load times
+# Run from src: python -m levels.level_cache
+if __name__ == "__main__":
+    # Compile through the importable module, so the pickles point at levels.level_cache and not at __main__
+    from levels.level_cache import compile_level, read_cached_level
+
+    root = join("..", "levels")
+    tmx_paths = sorted(join(root, planet, name) for planet in os.listdir(root) if planet.startswith("planet_")
+                       for name in os.listdir(join(root, planet)) if name.endswith(".tmx"))
+
+    total_cold = total_warm = 0
+    for tmx_path in tmx_paths:
+        start = time.perf_counter()
+        compile_level(tmx_path)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if read_cached_level(tmx_path) is None:
+            sys.exit(f"Cache of '{tmx_path}' could not be read back")
+        warm = time.perf_counter() - start
+
+        total_cold += cold
+        total_warm += warm
+        print(f"{tmx_path}: cold {cold * 1000:.2f} ms, warm {warm * 1000:.2f} ms")
+
+    print(f"Total: cold {total_cold * 1000:.2f} ms, warm {total_warm * 1000:.2f} ms")
@@ -1,71 +1,134 @@
-import json
-from os.path import join
-from pytmx.util_pygame import load_pygame  # type: ignore
+from concurrent.futures import ThreadPoolExecutor, wait
+from os.path import join, dirname
 from utils.settings import *
+from utils.assets import assets
+from utils.fonts import fonts
 from planets.planet import Planet
+from audio.music_player import MusicPlayer
 from levels.level import Level
+from levels.level_cache import load_level_map
+from levels.catalog import PlanetCatalog
+from utils.tracing import traced
 from ui.textbox import *
+from ui.overlays import OverlayQueue, ArrowOverlay
+
+# Load a level's map ( from the compiled level cache ) and decode its tilesets
+# Nothing here needs the display, so it can run on a worker thread
+@traced("parse_level")
+def parse_level(tmx_path):
+    tmx_map = load_level_map(tmx_path)
+    for tileset in tmx_map.tilesets:
+        if tileset.source:
+            assets.prefetch(join(dirname(tmx_path), tileset.source))
+    return tmx_map
 
 class LevelManager:
     def __init__(self, screen, clock):
         # General
-        self.number_of_planets = 4
-        self.root_path = None
+        self.catalog = PlanetCatalog()
+        self.number_of_planets = len(self.catalog)
         self.screen = screen
         self.clock = clock
-        self.text_shown = False
-        self.once = True
         self.onceLoad = True
-        self.oncePos = True
+
+        # Tutorial text boxes, shown over the level without stopping it
+        self.overlays = OverlayQueue()
+
+        # Background music, streamed and shared by every planet
+        self.music = MusicPlayer()
+
+        # The next level is parsed on a worker thread while the current one is played
+        self.prefetcher = ThreadPoolExecutor(max_workers = 1)
+        self.prefetched = None
 
         # Current Planet
         self.current_planet_index = 0
+        self.current_planet = None
         self.current_planet = self.load_planet()
 
         # Current Level
         self.current_level_index = 0
         self.current_level = self.load_level()
 
-    # Update the path which contains data for the current planet
-    def update_root_path(self):
-        self.root_path = join("..", "levels", f"planet_{self.current_planet_index}")
-
     # Load planet data and return a Planet Instance
+    @traced("LevelManager.load_planet")
     def load_planet(self):
-        self.update_root_path()
-
-        config_path = join(self.root_path, "planet_config.json")
-
-        with open(config_path, "r") as file:
-            data = json.load(file)
+        # Planet data was read once by the catalog
+        data = self.catalog.planet(self.current_planet_index)
         
         name = data["name"]
         gravity_strength = data["gravity_strength"]
         levels = data["levels"]
+        music = data["music"]
         self.onceLoad = True
 
-        # Create and return the Planet object
-        return Planet(name, gravity_strength, levels)
+        # Create the Planet object
+        planet = Planet(name, gravity_strength, levels, music)
+
+        # Release the previous planet's sounds only now, so the ones both planets use stay decoded
+        if self.current_planet is not None:
+            self.current_planet.audio_manager.close()
+
+        return planet
 
     # Load level data and return a Level Instance
+    @traced("LevelManager.load_level")
     def load_level(self):
         """
         Loads the current level and updates its parameters to match the saved or current game state.
         """
+        # Hints still queued belong to the previous level, they would point at the wrong places here
+        self.overlays.clear()
+
         level_config = self.current_planet.levels[self.current_level_index]
-        tmx_path = join(self.root_path, level_config["tmx_map"])
+        tmx_path = level_config["tmx_path"]
+
+        # Use the prefetched map if it is the right one ( waits for the worker if it isn't done yet )
+        if self.prefetched is not None and self.prefetched[0] == tmx_path:
+            tmx_map = self.prefetched[1].result()
+        else:
+            # Another level was prefetched ( e.g. a save was loaded ), let it finish so none of its images come in after the drop below
+            if self.prefetched is not None:
+                wait([self.prefetched[1]])
+            tmx_map = parse_level(tmx_path)
+        self.prefetched = None
+
+        # Converting images needs the display, so the tiles are loaded here, on the main thread
+        # Tilesets are shared between levels, so their images come from the asset registry
+        tmx_map.image_loader = assets.tileset_loader
+        tmx_map.reload_images()
+        # Decoded images this level didn't use were prefetched for another one, don't keep them around
+        assets.drop_prefetched()
 
         level_data = {
             "planet": self.current_planet,
-            "tmx_map": load_pygame(tmx_path),
+            "tmx_map": tmx_map,
             "permissions": level_config["permissions"],
         }
 
         # Update the current planet reference for consistency
         self.current_planet = level_data["planet"]
 
+        # Fades into the planet's music if it isn't already playing
+        self.music.play(self.current_planet.music)
+
         # Return a new Level instance with the updated data
-        return Level(level_data, self.callback)
+        level = Level(level_data, self.callback)
+        self.prefetch_next_level()
+        return level
+
+    # Path of the level coming after the current one, None after the last planet
+    def next_level_path(self):
+        next_level = self.catalog.next_level(self.current_planet_index, self.current_level_index)
+        if next_level is None:
+            return None
+        return self.catalog.level(*next_level)["tmx_path"]
+
+    # Start parsing the next level in the background
+    def prefetch_next_level(self):
+        tmx_path = self.next_level_path()
+        if tmx_path is not None:
+            self.prefetched = (tmx_path, self.prefetcher.submit(parse_level, tmx_path))
 
     # Cleanup sprites of the previous level
     def cleanup_level(self):
@@ -134,16 +197,42 @@ class LevelManager:
             print("Invalid save data: 'current_planet_index' or 'current_level_index' missing.")
         return self.current_level  # Return the current level
 
-    def run(self, dt):
+    @traced("LevelManager.draw")
+    def draw(self, alpha = 1):
+        """
+        Draw the current level, alpha of the way between its last two simulation steps.
+        """
+        self.current_level.draw(alpha)
+        self.overlays.draw()
+
+    # Queue the text box of a trigger zone, and its arrow if it has one
+    def show_hint(self, trigger):
+        font = fonts.get(trigger.font_size)
+        text = TextBox(trigger.box_position, trigger.box_size, self.screen, trigger.message, font=font, fade_time=trigger.fade_time)
+        self.overlays.push(text)
+
+        if trigger.arrow:
+            box_x, box_y = trigger.box_position
+            arrow_tip_x = box_x - 10  # Tip of the arrow slightly to the left of the box
+            arrow_tip_y = box_y + trigger.box_size[1] // 2 - 40  # Center vertically with the box
+            arrow_base_top = (arrow_tip_x + 60, arrow_tip_y - 10)  # Top of the arrow base
+            arrow_base_bottom = (arrow_tip_x + 60, arrow_tip_y + 10)  # Bottom of the arrow base
+
+            # Points at the dash box for a second and a half, once the text is gone
+            self.overlays.push(ArrowOverlay(self.screen, [(arrow_tip_x, arrow_tip_y), arrow_base_top, arrow_base_bottom], duration=1.5))
+
+    @traced("LevelManager.update")
+    def update(self, dt):
         """
-        Run the current level, updating its logic with the given delta time.
+        Advance the current level by one simulation step of dt seconds.
         """
-        go_next = self.current_level.run(dt)
-        pos = self.current_level.player.hitbox_rect
+        self.current_level.update(dt)
+        self.music.update()
+        self.overlays.update(dt)
 
         if self.current_planet_index != 0 and self.current_level_index == 0 and self.onceLoad:
             message = f"    Next planet: {self.current_planet.name}!           Gravity: {self.current_planet.gravity_strength}            Explore the levels!"
-            font = pygame.font.Font(None, 36)
+            font = fonts.get(36)
 
             # Calculate the text box dimensions
             box_width = SCREEN_WIDTH // 3
@@ -151,199 +240,11 @@ class LevelManager:
             box_position = ((SCREEN_WIDTH - box_width) // 2, (SCREEN_HEIGHT - box_height) // 2)
 
             # Initialize the TextBox
-            self.text_box = TextBox(box_position, (box_width, box_height), self.screen, self.clock, message, font, 10)
-            self.text_box.run()
+            self.text_box = TextBox(box_position, (box_width, box_height), self.screen, message, font, 10)
+            self.overlays.push(self.text_box)
             self.onceLoad = False
 
-        if not self.text_shown and self.current_planet_index == 0 and self.current_level_index == 0:
-            self.text_shown = True
-            font = pygame.font.Font(None, 30)
-
-            # Calculate box dimensions relative to the screen size
-            box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-            box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-            # Center the box on the screen
-            box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-            # Create and display the text box for welcome
-            text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "  Welcome to the tutorial!     Press [Enter] to skip", font=font, fade_time=10)
-            text.run()
-
-
-            font = pygame.font.Font(None, 26)
-
-            # Calculate box dimensions relative to the screen size
-            box_width = SCREEN_WIDTH // 4  # e.g., 1/3 of the screen width
-            box_height = SCREEN_HEIGHT // 6  # e.g., 1/4 of the screen height
-
-            # Center the box on the screen
-            box_position = ((SCREEN_WIDTH - box_width) // 2 + 500, (SCREEN_HEIGHT - box_height) // 2)
-
-            # Create and display the text box
-            text = TextBox(box_position, (box_width, box_height), self.screen, self.clock,
-                            "                              To get to next level you need      to touch the red flag!        Press [Enter] to skip",
-                            font=font, fade_time=10)
-            text.run()
-
-            font = pygame.font.Font(None, 36)
-
-            # Calculate box dimensions relative to the screen size
-            box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-            box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-            # Center the box on the screen
-            box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-            # Create and display the text box
-            text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "  Try moving using the arrows on your keyboard!", font=font, fade_time=10)
-            text.run()
-
-        elif not self.text_shown and self.current_level_index == 1 and self.current_planet_index == 0:
-            self.text_shown = True
-            font = pygame.font.Font(None, 30)
-
-            # Calculate box dimensions relative to the screen size
-            box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-            box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-            # Center the box on the screen
-            box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-            # Create and display the text box for welcome
-            text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "           Good job!             Now let's test if u can get past this!", font=font, fade_time=10)
-            text.run()
-
-        elif not self.text_shown and self.current_level_index == 1 and self.current_planet_index == 0:
-            self.text_shown = True
-            font = pygame.font.Font(None, 30)
-
-            # Calculate box dimensions relative to the screen size
-            box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-            box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-            # Center the box on the screen
-            box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-            # Create and display the text box for welcome
-            text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "           Good job!             Now let's test if u can get past this!", font=font, fade_time=10)
-            text.run()
-        
-        elif (not self.text_shown and self.current_level_index == 2 and self.current_planet_index == 0) or (self.once and (430 <= pos.x and pos.x <= 460) and (540 <= pos.y and pos.y <= 550) and self.current_level_index == 2 and self.current_planet_index == 0):
-            if (430 <= pos.x and pos.x <= 460) and (540 <= pos.y and pos.y <= 550):
-                self.once = False
-                self.text_shown = True
-                font = pygame.font.Font(None, 30)
-
-                # Calculate box dimensions relative to the screen size
-                box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-                box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-                # Center the box on the screen
-                box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-                # Create and display the text box for welcome
-                text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "  Jump from wall to wall to   get up!  ", font=font, fade_time=10)
-                text.run()
-            else:
-                self.text_shown = True
-                font = pygame.font.Font(None, 30)
-
-                # Calculate box dimensions relative to the screen size
-                box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-                box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-                # Center the box on the screen
-                box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-                # Create and display the text box for welcome
-                text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "  Let's try to make it harder!   Try to jump into a wall and see what happens!", font=font, fade_time=10)
-                text.run()
-        elif (not self.text_shown and self.current_level_index == 3 and self.current_planet_index == 0) or (self.oncePos and (530 <= pos.x and pos.x <= 700) and (600 <= pos.y and pos.y <= 620) and self.current_level_index == 3 and self.current_planet_index == 0):
-            font = pygame.font.Font(None, 30)
-
-            print("AOLO??")
-            if self.oncePos and (530 <= pos.x and pos.x <= 700) and (600 <= pos.y and pos.y <= 620) and self.current_level_index == 3 and self.current_planet_index == 0:
-                # Calculate box dimensions relative to the screen size
-                self.oncePos = False
-                box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-                box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-                # Center the box on the screen
-                box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-                # Create and display the text box for welcome
-                text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "  This will get a little hard!    Use the dash to advance on the wall while jumping", font=font, fade_time=10)
-                text.run()
-
-                font = pygame.font.Font(None, 30)
-
-                # Calculate box dimensions relative to the screen size
-                box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-                box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-                # Center the box on the screen
-                box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-                # Create and display the text box for welcome
-                text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "   Hint for this level:         You can dash when u fall! ", font=font, fade_time=10)
-                text.run()
-            else:
-                # Calculate box dimensions relative to the screen size
-                box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-                box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-                # Center the box on the screen
-                box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-                # Create and display the text box for welcome
-                text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "  Wow! Great progress!          Now let's introduce dashing moves! ", font=font, fade_time=10)
-                text.run()
-
-                font = pygame.font.Font(None, 30)
-
-                # Calculate box dimensions relative to the screen size
-                box_width = SCREEN_WIDTH // 3  # e.g., 1/3 of the screen width
-                box_height = SCREEN_HEIGHT // 5  # e.g., 1/4 of the screen height
-
-                # Center the box on the screen
-                box_position = ((SCREEN_WIDTH - box_width) // 2 + 20, (SCREEN_HEIGHT - box_height) // 2)
-
-                # Create and display the text box for welcome
-                text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "  Press [D] to dash!  ", font=font, fade_time=10)
-                text.run()
-
-                font = pygame.font.Font(None, 20)
-
-                # Calculate box dimensions relative to the screen size
-                box_width = SCREEN_WIDTH // 4  # e.g., 1/3 of the screen width
-                box_height = SCREEN_HEIGHT // 6  # e.g., 1/4 of the screen height
-
-                # Center the box on the screen
-                box_position = ((SCREEN_WIDTH - box_width) // 2 - 380, (SCREEN_HEIGHT - box_height) // 2 - 280)
-
-                # Create and display the text box for welcome
-                text = TextBox(box_position, (box_width, box_height), self.screen, self.clock, "   This is the dash cooldown! When \"on cooldown\" the image  will be white!", font=font, fade_time=10)
-                text.run()
-
-                arrow_tip_x = box_position[0] - 10  # Tip of the arrow slightly to the left of the box
-                arrow_tip_y = box_position[1] + box_height // 2 - 40  # Center vertically with the box
-                arrow_base_top = (arrow_tip_x + 60, arrow_tip_y - 10)  # Top of the arrow base
-                arrow_base_bottom = (arrow_tip_x + 60, arrow_tip_y + 10)  # Bottom of the arrow base
-
-                pygame.draw.polygon(
-                    self.screen,
-                    (255, 255, 255),  # Arrow color (white)
-                    [  # Points of the arrow
-                        (arrow_tip_x, arrow_tip_y),
-                        arrow_base_top,
-                        arrow_base_bottom
-                    ]
-                )
-
-                pygame.display.update()
-                pygame.time.delay(1500)
-            
-
-        self.text_shown = go_next
+        # Hints of the trigger zones the player just walked into
+        for trigger in self.current_level.triggers.enter(self.current_level.player.hitbox_rect):
+            self.show_hint(trigger)
     
\ No newline at end of file
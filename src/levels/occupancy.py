@@ -0,0 +1,80 @@
+from utils.settings import *
+
+# Cell values
+EMPTY = 0
+SOLID = 1
+HAZARD = 2
+
+class OccupancyGrid:
+    def __init__(self, width, height):
+        """
+        One byte per tile telling what the static geometry of a level holds there.
+
+        :param width: Width of the level, in tiles.
+        :param height: Height of the level, in tiles.
+        """
+        self.width = width
+        self.height = height
+        self.cells = bytearray(width * height)
+
+    def get(self, col, row):
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return self.cells[row * self.width + col]
+        return EMPTY
+
+    # Mark every tile covered by the rect ( tiles bigger than TILE_SIZE cover several cells )
+    def mark(self, rect, value):
+        for row in range(max(rect.top // TILE_SIZE, 0), min((rect.bottom - 1) // TILE_SIZE + 1, self.height)):
+            for col in range(max(rect.left // TILE_SIZE, 0), min((rect.right - 1) // TILE_SIZE + 1, self.width)):
+                self.cells[row * self.width + col] = value
+
+    # Same result as colliderect against the tile rects, but only looks at the cells under the rect
+    def overlaps(self, rect):
+        if rect.width <= 0 or rect.height <= 0:
+            return False
+        for row in range(max(rect.top // TILE_SIZE, 0), min((rect.bottom - 1) // TILE_SIZE + 1, self.height)):
+            start = row * self.width
+            for col in range(max(rect.left // TILE_SIZE, 0), min((rect.right - 1) // TILE_SIZE + 1, self.width)):
+                if self.cells[start + col]:
+                    return True
+        return False
+
+    # Greedily merge runs of equal cells into maximal rectangles: widest run first, then grown downwards.
+    # Returns (rect, value) pairs in world coordinates. Solid and hazard cells are never merged together
+    def merged_rects(self):
+        cells = self.cells
+        width = self.width
+        visited = bytearray(len(cells))
+        rects = []
+
+        for row in range(self.height):
+            col = 0
+            while col < width:
+                index = row * width + col
+                value = cells[index]
+                if value == EMPTY or visited[index]:
+                    col += 1
+                    continue
+
+                # Widen the run along the row
+                end = col
+                while end + 1 < width and cells[index + end + 1 - col] == value and not visited[index + end + 1 - col]:
+                    end += 1
+
+                # Grow it down while the whole run below matches
+                bottom = row
+                while bottom + 1 < self.height:
+                    start = (bottom + 1) * width
+                    if all(cells[start + c] == value and not visited[start + c] for c in range(col, end + 1)):
+                        bottom += 1
+                    else:
+                        break
+
+                for r in range(row, bottom + 1):
+                    visited[r * width + col:r * width + end + 1] = b"\x01" * (end - col + 1)
+
+                rect = pygame.Rect(col * TILE_SIZE, row * TILE_SIZE, (end - col + 1) * TILE_SIZE, (bottom - row + 1) * TILE_SIZE)
+                rects.append((rect, value))
+                col = end + 1
+
+        return rects
@@ -0,0 +1,85 @@
+from utils.settings import *
+from sprites.spatial_hash import SpatialHash
+
+# Name of the TMX object layer holding the trigger zones
+TRIGGER_LAYER = "Triggers"
+
+# Bool properties saved without a type come as strings, where bool("false") would be True
+def parse_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
+class Trigger:
+    def __init__(self, obj, order):
+        """
+        A zone of a level showing a hint when the player walks into it, read from a TMX object.
+
+        Object properties ( all optional except message ):
+            message: Text of the hint.
+            font_size: Size of the default font the text is written with. 30 by default.
+            fade_time: Time (in seconds) the hint stays on screen. 10 by default.
+            once: Show the hint only the first time the zone is entered. True by default.
+            box_width, box_height: Size of the text box, in pixels. A third and a fifth of the screen by default.
+            box_x, box_y: Offset of the text box from the center of the screen, in pixels. (20, 0) by default.
+            arrow: Point an arrow at the text box's left once it is gone.
+
+        :param obj: The pytmx object of the zone.
+        :param order: Position of the object in its layer. Hints entered together are shown in this order.
+        """
+        properties = obj.properties
+        self.rect = pygame.Rect(int(obj.x), int(obj.y), int(obj.width), int(obj.height))
+        self.order = order
+        self.message = properties["message"]
+        self.font_size = int(properties.get("font_size", 30))
+        self.fade_time = float(properties.get("fade_time", 10))
+        self.once = parse_bool(properties.get("once", True))
+        self.arrow = parse_bool(properties.get("arrow", False))
+
+        box_width = int(properties.get("box_width", SCREEN_WIDTH // 3))
+        box_height = int(properties.get("box_height", SCREEN_HEIGHT // 5))
+        self.box_size = (box_width, box_height)
+        self.box_position = ((SCREEN_WIDTH - box_width) // 2 + int(properties.get("box_x", 20)),
+                             (SCREEN_HEIGHT - box_height) // 2 + int(properties.get("box_y", 0)))
+
+class TriggerZones:
+    def __init__(self, tmx_map):
+        """
+        Trigger zones of a level, bucketed in a spatial hash when the level is loaded,
+        so finding the zones the player is in is a single point query, however many zones there are.
+
+        :param tmx_map: The level's map. Levels without a Triggers layer have no zones.
+        """
+        self.grid = SpatialHash(CULL_CELL_SIZE)
+        self.inside = set()
+        self.fired = set()
+
+        # Most levels have no hints, so a missing layer isn't worth a warning
+        try:
+            layer = tmx_map.get_layer_by_name(TRIGGER_LAYER)
+        except ValueError:
+            layer = []
+
+        for order, obj in enumerate(layer):
+            self.grid.insert(Trigger(obj, order))
+
+    def __len__(self):
+        return len(self.grid)
+
+    def enter(self, rect):
+        """
+        Triggers the center of rect ( the player's hitbox ) has just walked into, in layer order.
+        A trigger fires again after the player left its zone, unless it is a once trigger.
+        """
+        if not len(self.grid):
+            return []
+
+        point = rect.center
+        inside = {trigger for trigger in self.grid.query(pygame.Rect(point, (1, 1))) if trigger.rect.collidepoint(point)}
+        entered = [trigger for trigger in inside if trigger not in self.inside and trigger not in self.fired]
+        self.inside = inside
+
+        for trigger in entered:
+            if trigger.once:
+                self.fired.add(trigger)
+        return sorted(entered, key = lambda trigger: trigger.order)
@@ -1,10 +1,28 @@
+import argparse
+import atexit
 from utils.settings import *
+from utils import timer
+from utils.input_recording import InputRecording, InputRecorder, InputReplay
 from levels.level_manager import LevelManager
 from ui.startup import StartupScreen
 from ui.savegame import SaveGame
+from audio.music_player import MUSIC_END
+from ui.perfhud import perf_hud
+from utils.tracing import tracer
 
 class Game:
-    def __init__(self):
+    def __init__(self, record_path = None, replay_path = None, trace_path = None):
+        """
+        :param record_path: Save the keys of every simulation step to this file when the game is closed.
+        :param replay_path: Play back an input recording instead of reading the keyboard.
+        :param trace_path: Trace the game from the start and write the trace to this file when the game is closed.
+            F4 starts and stops a trace at any time.
+        """
+        # Started first, so the loading of the first level is in the trace
+        self.trace_path = trace_path or "trace.json"
+        if trace_path:
+            tracer.start(trace_path)
+
         pygame.init()
 
         # Rendering
@@ -21,29 +39,125 @@ class Game:
         self.startup_screen = StartupScreen(self.level_manager, self.clock)
         self.save_game = SaveGame(self.clock)
 
+        # Input recording and replay. Both need the timers on simulated time, or replays would drift
+        self.record_path = record_path
+        self.replay = None
+        self.input = None
+        self.frame = 0
+        self.ticks = 0
+        if record_path or replay_path:
+            timer.set_clock(lambda: int(self.ticks))
+        if replay_path:
+            recording = InputRecording.load(replay_path)
+            if recording.timestep != SIMULATION_STEP:
+                print(f"Warning: recorded with a {recording.timestep:.5f}s timestep, replaying with {SIMULATION_STEP:.5f}s")
+            self.level_manager.load_save_info({"current_planet_index": recording.planet_index,
+                                               "current_level_index": recording.level_index})
+            self.replay = InputReplay(recording)
+            self.input = self.replay
+
+    # Save the recording, if one was started
+    def save_recording(self):
+        if self.record_path and isinstance(self.input, InputRecorder):
+            atexit.unregister(self.save_recording)
+            self.input.recording.save(self.record_path)
+            print(f"Recorded {len(self.input.recording)} steps to '{self.record_path}'")
+
+    # Save the recording, if there is one, and close the game
+    def quit(self):
+        self.save_recording()
+        tracer.stop()
+        pygame.quit()
+        sys.exit()
+
+    # Advance the game by one fixed simulation step
+    def step(self):
+        # Nothing left to replay, the loop closes the game after this frame
+        if self.replay is not None and self.replay.finished:
+            return
+
+        if self.input is not None:
+            self.input.advance(self.frame)
+            self.level_manager.current_level.player.get_pressed = self.input.get_pressed
+        self.ticks += SIMULATION_STEP * 1000
+        self.frame += 1
+        self.level_manager.update(SIMULATION_STEP)
+
     def run(self):
 
-        self.startup_screen.run()
+        # A replay starts right away, on the level it was recorded on
+        if self.replay is None:
+            self.startup_screen.run()
+
+        # Recording starts on the level picked in the startup screen
+        if self.record_path:
+            recording = InputRecording(self.level_manager.current_planet_index, self.level_manager.current_level_index)
+            self.input = InputRecorder(recording)
+            # The menus close the game with sys.exit() themselves, so the recording is also saved on the way out
+            atexit.register(self.save_recording)
+
+        # Time the simulation is behind the real clock
+        accumulator = 0
 
         while True:
-            dt = self.clock.tick(FPS)/1000
+            frame_time = self.clock.tick(FPS)
+            accumulator += frame_time/1000
+            perf_hud.add("frame", frame_time)
+
+            with tracer.span("events"):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.quit()
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_ESCAPE: 
+                            if self.save_game.run(self.screen, self.level_manager.get_save_info()) == False:
+                                self.quit()
+                        elif event.key == pygame.K_RETURN:
+                            self.level_manager.overlays.skip()
+                        elif event.key == pygame.K_F3:
+                            perf_hud.toggle()
+                        elif event.key == pygame.K_F4:
+                            tracer.toggle(self.trace_path)
+                    elif event.type == MUSIC_END:
+                        self.level_manager.music.track_ended()
+
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE: 
-                        if self.save_game.run(self.screen, self.level_manager.get_save_info()) == False:
-                            pygame.quit()
-                            sys.exit()
+            # Run as many fixed steps as the elapsed time covers
+            update_start = time.perf_counter()
+            steps = 0
+            with tracer.span("simulate"):
+                while accumulator >= SIMULATION_STEP and steps < MAX_SIMULATION_STEPS:
+                    self.step()
+                    accumulator -= SIMULATION_STEP
+                    steps += 1
 
+            # Too far behind ( a text box or a menu blocked the loop ), drop the time instead of fast forwarding through it
+            if steps == MAX_SIMULATION_STEPS:
+                accumulator = min(accumulator, SIMULATION_STEP)
 
-            self.level_manager.run(dt)
+            # Render between the last two steps, by the fraction of a step left over
+            draw_start = time.perf_counter()
+            self.level_manager.draw(accumulator / SIMULATION_STEP)
 
-            pygame.display.update()
+            perf_hud.add("update", (draw_start - update_start) * 1000)
+            perf_hud.add("draw", (time.perf_counter() - draw_start) * 1000)
+            perf_hud.end_frame()
 
+            with tracer.span("present"):
+                pygame.display.update()
 
+            if self.replay is not None and self.replay.finished:
+                print(f"Replay finished after {self.frame} steps")
+                self.quit()
+
+
+# Example: python main.py --record session.rec, then python main.py --replay session.rec
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="Shifting Realms")
+    parser.add_argument("--record", help="save the keys pressed while playing to this file")
+    parser.add_argument("--replay", help="play back the keys saved in this file")
+    parser.add_argument("--trace", help="write a Chrome trace of the whole session to this file")
+    args = parser.parse_args()
+
+    game = Game(args.record, args.replay, args.trace)
     game.run()
\ No newline at end of file
@@ -3,19 +3,21 @@ from audio.audio_manager import AudioManager
 from ui.textbox import *  
 
 class Planet:
-    def __init__(self, name, gravity_strength, levels):
+    def __init__(self, name, gravity_strength, levels, music):
         """
         Initialize the Planet class.
 
         :param name: Name of the planet.
         :param gravity_strength: Gravity strength of the planet.
         :param levels: Levels associated with the planet.
+        :param music: Paths of the background music tracks, played in order.
         :param screen: Pygame screen where the text will be displayed.
         :param font: Pygame font object for rendering the text.
         """
         self.name = name
         self.gravity_strength = gravity_strength
         self.levels = levels
+        self.music = music
         self.audio_manager = AudioManager()
 
     
@@ -1,6 +1,8 @@
 from utils.settings import *
 from sprites.sprite import Sprite
+from sprites.spatial_hash import SpatialHash
 from entities.player import Player
+from ui.perfhud import perf_hud
 
 class AllSprites(pygame.sprite.Group):
     def __init__(self, tmx_map):
@@ -12,30 +14,133 @@ class AllSprites(pygame.sprite.Group):
             'left': 0,
             'right': -1 * tmx_map.width * TILE_SIZE + SCREEN_WIDTH
         }
+
+        # Draw order buckets, one per Z layer, kept up to date as sprites join and leave the group
+        self.layers = {z: [] for z in sorted(Z_LAYERS.values())}
+
+        # Baked chunks of the static layers, indexed per Z layer for viewport culling
+        self.chunks = {}
+        self.culling = True
+
         try:
             bg_tile = tmx_map.get_layer_by_name("Background")
             z = Z_LAYERS["bg"]
-            for pos_x, pos_y, surf in bg_tile.tiles():
-                self.bg_tiles.append(Sprite((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf, self, Z_LAYERS["bg"]))
+            tiles = [((pos_x * TILE_SIZE, pos_y * TILE_SIZE), surf) for pos_x, pos_y, surf in bg_tile.tiles()]
+            self.bg_tiles = self.bake_chunks(tiles, z)
         except ValueError:
             print("Layer 'Background' not found.")
 
+    # Composite the tiles of a static layer into a few CHUNK_SIZE surfaces, so they are blitted as one sprite per chunk
+    def bake_chunks(self, tiles, z):
+        chunk_tiles = {}
+        for pos, surf in tiles:
+            key = (int(pos[0] // CHUNK_SIZE), int(pos[1] // CHUNK_SIZE))
+            chunk_tiles.setdefault(key, []).append((pos, surf))
+
+        chunks = []
+        for key, tiles_in_chunk in chunk_tiles.items():
+            # Tiles bigger than TILE_SIZE may hang over the chunk border, so the chunk grows to fit them
+            bounds = pygame.Rect(tiles_in_chunk[0][0], tiles_in_chunk[0][1].get_size())
+            bounds.unionall_ip([pygame.Rect(pos, surf.get_size()) for pos, surf in tiles_in_chunk])
+
+            chunk_surf = pygame.Surface(bounds.size, pygame.SRCALPHA)
+            for pos, surf in tiles_in_chunk:
+                chunk_surf.blit(surf, (pos[0] - bounds.left, pos[1] - bounds.top))
+            # RLE encoding lets the blit skip the transparent runs between tiles
+            chunk_surf = chunk_surf.convert_alpha()
+            chunk_surf.set_alpha(255, pygame.RLEACCEL)
+
+            # Chunks never move, so they are looked up by the cells they cover instead of going in a layer bucket
+            chunk = Sprite(bounds.topleft, chunk_surf, (), z)
+            self.chunks.setdefault(z, SpatialHash(CULL_CELL_SIZE)).insert(chunk)
+            self.add(chunk)
+            chunks.append(chunk)
+        return chunks
+
+    def add_internal(self, sprite, layer = None):
+        super().add_internal(sprite, layer)
+        if sprite not in self.chunks.get(sprite.z, ()):
+            self.layers[sprite.z].append(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        if sprite in self.chunks.get(sprite.z, ()):
+            self.chunks[sprite.z].remove(sprite)
+        else:
+            self.layers[sprite.z].remove(sprite)
+
+    # The part of the map currently on screen, in world coordinates
+    def camera_rect(self):
+        return pygame.Rect(-self.offset.x, -self.offset.y, SCREEN_WIDTH, SCREEN_HEIGHT)
+
     def cam_constraint(self):
         self.offset.x = self.offset.x if self.offset.x < self.borders['left'] else self.borders['left']
         self.offset.x = self.offset.x if self.offset.x > self.borders['right'] else self.borders['right']
 
-    def draw(self, target_pos):
+    # Where to draw a sprite: between its rect before and after the last simulation step, alpha of the way
+    def render_pos(self, sprite, alpha = 1):
+        # Every drawn sprite has a prev_rect ( Sprite sets it, and so do Player and Flag )
+        prev_rect = sprite.prev_rect
+        if alpha >= 1 or prev_rect.center == sprite.rect.center:
+            return vector(sprite.rect.topleft)
+        # Centers, because the player's prev_rect is its hitbox, which is narrower than its image
+        center = vector(prev_rect.center).lerp(sprite.rect.center, alpha)
+        return center - vector(sprite.rect.size) / 2
+
+    def draw(self, target_pos, alpha = 1):
         # Calculate camera offset
         self.offset.x = -(target_pos[0] - SCREEN_WIDTH / 2)
         self.offset.y = 0
         self.cam_constraint()
+        camera_rect = self.camera_rect()
+        blits = 0
+
+        # Layers are already in draw order. Inside a layer, the static chunks go underneath everything else
+        for z, sprites in self.layers.items():
+            if z in self.chunks:
+                chunks = self.chunks[z].query(camera_rect) if self.culling else self.chunks[z].sprites()
+                for chunk in chunks:
+                    self.display_surface.blit(chunk.image, chunk.rect.topleft + self.offset)
+                blits += len(chunks)
+
+            for drawable in sprites:
+                offset_pos = self.render_pos(drawable, alpha) + self.offset
+                if isinstance(drawable, Player):
+                    # Draw afterimages first for the player
+                    drawable.draw_afterimages(self.display_surface, self.offset)
+                    if drawable.dashing:
+                        blits += len(drawable.afterimages)
+                # Draw the sprite itself
+                self.display_surface.blit(drawable.image, offset_pos)
+            blits += len(sprites)
+
+        perf_hud.add("blits", blits)
+
+class CollisionSprites(pygame.sprite.Group):
+    def __init__(self):
+        super().__init__()
+        # Broadphase grid with TILE_SIZE cells. Anything that collides ( player, future enemies, projectiles ) queries it
+        self.grid = SpatialHash(TILE_SIZE)
+
+        # The few sprites that move, so contact checks don't have to filter the whole group
+        self.moving_sprites = []
+
+    def add_internal(self, sprite, layer = None):
+        super().add_internal(sprite, layer)
+        self.grid.insert(sprite)
+        if hasattr(sprite, "moving"):
+            self.moving_sprites.append(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.grid.remove(sprite)
+        if hasattr(sprite, "moving"):
+            self.moving_sprites.remove(sprite)
+
+    # Called by sprites that move ( like MovingSprite ) so they get re-bucketed
+    def update_position(self, sprite):
+        self.grid.move(sprite)
 
-        # Combine background tiles with sprites for unified sorting
-        all_drawables = self.bg_tiles + list(self)
-        for drawable in sorted(all_drawables, key=lambda sprite: getattr(sprite, 'z', 0)):
-            offset_pos = drawable.rect.topleft + self.offset
-            if isinstance(drawable, Player):
-                # Draw afterimages first for the player
-                drawable.draw_afterimages(self.display_surface, self.offset)
-            # Draw the sprite itself
-            self.display_surface.blit(drawable.image, offset_pos)
\ No newline at end of file
+    # Sprites that may collide with the given rect
+    def query(self, rect):
+        return self.grid.query(rect)
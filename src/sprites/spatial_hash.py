@@ -0,0 +1,63 @@
+from utils.settings import *
+
+class SpatialHash:
+    def __init__(self, cell_size = TILE_SIZE):
+        """
+        Bucket sprites by the (column, row) grid cells their rect overlaps.
+
+        :param cell_size: Width and height of a grid cell, in pixels.
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.sprite_cells = {}
+
+    def __len__(self):
+        return len(self.sprite_cells)
+
+    def __contains__(self, sprite):
+        return sprite in self.sprite_cells
+
+    # Every cell covered by the rect, as (column, row) keys
+    def cells_for(self, rect):
+        left = int(rect.left // self.cell_size)
+        top = int(rect.top // self.cell_size)
+        right = int((rect.right - 1) // self.cell_size)
+        bottom = int((rect.bottom - 1) // self.cell_size)
+        return [(col, row) for col in range(left, right + 1) for row in range(top, bottom + 1)]
+
+    def insert(self, sprite):
+        keys = self.cells_for(sprite.rect)
+        for key in keys:
+            self.cells.setdefault(key, []).append(sprite)
+        self.sprite_cells[sprite] = keys
+
+    def remove(self, sprite):
+        for key in self.sprite_cells.pop(sprite, ()):
+            bucket = self.cells[key]
+            bucket.remove(sprite)
+            if not bucket:
+                del self.cells[key]
+
+    # Re-bucket a sprite after its rect changed. Cheap when it stays in the same cells
+    def move(self, sprite):
+        keys = self.cells_for(sprite.rect)
+        if keys != self.sprite_cells.get(sprite):
+            self.remove(sprite)
+            for key in keys:
+                self.cells.setdefault(key, []).append(sprite)
+            self.sprite_cells[sprite] = keys
+
+    # Sprites whose cells overlap the rect, without duplicates
+    def query(self, rect):
+        found = {}
+        for key in self.cells_for(rect):
+            for sprite in self.cells.get(key, ()):
+                found[sprite] = None
+        return list(found)
+
+    def sprites(self):
+        return list(self.sprite_cells)
+
+    def clear(self):
+        self.cells.clear()
+        self.sprite_cells.clear()
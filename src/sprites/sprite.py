@@ -1,22 +1,35 @@
 from utils.settings import *
+from utils.assets import assets
 
 from pygame.math import Vector2 as vector
 from utils.settings import WHITE, TILE_SIZE
 
 class Sprite(pygame.sprite.Sprite):
 	def __init__(self, pos, surf = pygame.Surface((TILE_SIZE, TILE_SIZE)), groups = None, z = Z_LAYERS['main']):
-		super().__init__(groups)
+		# Layer and rects are set before joining the groups, which bucket sprites by them
+		self.z = z
 		self.image = surf
 
-		# Rects
+		# Rects. The renderer interpolates from prev_rect, moving sprites update it every step
 		self.rect = self.image.get_rect(topleft = pos)
 		self.prev_rect = self.rect.copy()
-		self.z = z
+		super().__init__(groups)
 		
         # If it is a object that does damage, this field becomes true
 		self.damage = False
 
+# Invisible collision area, usually several merged terrain tiles
+class Collider(pygame.sprite.Sprite):
+	def __init__(self, rect, groups, damage = False):
+		self.rect = pygame.Rect(rect)
+		self.prev_rect = self.rect.copy()
+		self.damage = damage
+		super().__init__(groups)
+
 class MovingSprite(Sprite):
+	# Class level, so hasattr(sprite, "moving") already works while the sprite joins its groups
+	moving = True
+
 	def __init__(self, groups, start_pos, end_pos, move_direction, speed):
 		surf = pygame.Surface((192, 32))
 		super().__init__(start_pos, surf, groups)
@@ -24,7 +37,7 @@ class MovingSprite(Sprite):
 		# PROBLEM: This loads the entire platforms.png ( so the whole image, not a specific platform )
 		# To test: Go to LevelManager, set planet 1, level 1, run the game and go to the moving platforms...
 		# Update(Antonio): Problem solved, Took the whole image and got just the top left platform for the moving platforms
-		sprite_sheet = pygame.image.load("../assets/graphics/tilesets/platforms.png")
+		sprite_sheet = assets.image("../assets/graphics/tilesets/platforms.png")
 		platform_rect = pygame.Rect(0, 0, 192, 32)
 		surf.blit(sprite_sheet, (0, 0), platform_rect)
 		self.image = surf
@@ -36,9 +49,9 @@ class MovingSprite(Sprite):
 			self.rect.midtop = start_pos
 		self.start_pos = start_pos
 		self.end_pos = end_pos
+		self.update_grid()
 
 		# Movement
-		self.moving = True
 		self.speed = speed
 		if move_direction == "x":
 			self.direction = vector(1, 0)
@@ -67,4 +80,11 @@ class MovingSprite(Sprite):
 	def update(self, dt):
 		self.prev_rect = self.rect.copy()
 		self.rect.topleft += self.direction * self.speed * dt
-		self.check_bounds()
\ No newline at end of file
+		self.check_bounds()
+		self.update_grid()
+
+	# Re-bucket the platform in the collision grid after it moved
+	def update_grid(self):
+		for group in self.groups():
+			if hasattr(group, "update_position"):
+				group.update_position(self)
\ No newline at end of file
@@ -1,8 +1,54 @@
+import re
 import pygame
 from utils.settings import *
 
+class GlyphAtlas:
+    def __init__(self, font, color):
+        """
+        Single characters of a font, each rendered once, with their measured advances.
+
+        :param font: The font object the glyphs are rendered with.
+        :param color: Color of the glyphs.
+        """
+        self.font = font
+        self.color = color
+        self.glyphs = {}
+        self.advances = {}
+
+    def advance(self, char):
+        """Horizontal distance from this character to the next one, in pixels."""
+        advance = self.advances.get(char)
+        if advance is None:
+            metrics = self.font.metrics(char)
+            if metrics and metrics[0] is not None:
+                advance = metrics[0][4]
+            else:
+                advance = self.font.size(char)[0]
+            self.advances[char] = advance
+        return advance
+
+    def glyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            glyph = self.font.render(char, True, self.color)
+            self.glyphs[char] = glyph
+        return glyph
+
+    def width(self, text):
+        return sum(self.advance(char) for char in text)
+
+# Glyph atlases by (font, color). Fonts come from the shared font cache, so the atlases are shared too
+atlases = {}
+
+def get_atlas(font, color):
+    atlas = atlases.get((font, color))
+    if atlas is None:
+        atlas = GlyphAtlas(font, color)
+        atlases[(font, color)] = atlas
+    return atlas
+
 class TextDisplay:
-    def __init__(self, position, text, font, screen, max_chars=30, line_spacing=10):
+    def __init__(self, position, text, font, screen, max_chars=30, line_spacing=10, max_width=None):
         """
         Initialize the TextDisplay class.
 
@@ -12,6 +58,7 @@ class TextDisplay:
         :param screen: The screen surface where the text will be drawn.
         :param max_chars: Maximum number of characters per line.
         :param line_spacing: Space between lines in pixels.
+        :param max_width: Maximum width of a line in pixels, no limit if None.
         """
         self.position = position
         self.text = text
@@ -19,17 +66,65 @@ class TextDisplay:
         self.screen = screen
         self.max_chars = max_chars
         self.line_spacing = line_spacing
+        self.max_width = max_width
+        self.atlas = get_atlas(font, WHITE)
 
         self.lines = self._split_text()  # Split the text into lines
         self.current_line_index = 0  # Current line being typed
-        self.current_text = ""  # Current text being displayed
         self.typing_index = 0  # Typing progress index for the current line
         self.typing_speed = 1  # Characters per frame
         self.finished = False  # True when typing is complete
 
+        # One surface per line, kept for the whole display. Typing blits the new glyphs onto it at the pen position
+        self.line_surfaces = [self._line_surface(line) for line in self.lines]
+        self.pen_x = 0  # Where the next glyph of the current line goes
+
+    def _fits(self, text):
+        if len(text) > self.max_chars:
+            return False
+        return self.max_width is None or self.atlas.width(text) <= self.max_width
+
     def _split_text(self):
-        """Split the text into lines of at most max_chars characters."""
-        return [self.text[i:i + self.max_chars] for i in range(0, len(self.text), self.max_chars)]
+        """Split the text into lines at the spaces between words, each fitting max_chars and max_width."""
+        lines = []
+        current = ""
+        for token in re.findall(r"\s*\S+", self.text):
+            if not current:
+                # Spaces at the start of the text are kept if they fit, the ones at a line break are dropped
+                current = token if not lines and self._fits(token) else token.lstrip()
+            elif self._fits(current + token):
+                current += token
+            else:
+                lines.append(current)
+                current = token.lstrip()
+
+            # A word too long for a line of its own is cut
+            while not self._fits(current):
+                cut = 1
+                while cut < len(current) and self._fits(current[:cut + 1]):
+                    cut += 1
+                lines.append(current[:cut])
+                current = current[cut:]
+
+        if current:
+            lines.append(current)
+        return lines
+
+    def _line_surface(self, line):
+        # Wide enough for the advances, and for the glyphs overhanging them
+        width = 1
+        x = 0
+        for char in line:
+            width = max(width, x + self.atlas.glyph(char).get_width())
+            x += self.atlas.advance(char)
+        return pygame.Surface((width, self.font.get_height()), pygame.SRCALPHA)
+
+    @property
+    def current_text(self):
+        """Part of the current line typed so far."""
+        if self.current_line_index < len(self.lines):
+            return self.lines[self.current_line_index][:self.typing_index]
+        return ""
 
     def update(self):
         """Update the typing progress for the current line."""
@@ -40,13 +135,18 @@ class TextDisplay:
         if self.current_line_index < len(self.lines):
             current_line = self.lines[self.current_line_index]
             if self.typing_index < len(current_line):
-                self.current_text += current_line[self.typing_index]
-                self.typing_index += 1
+                surface = self.line_surfaces[self.current_line_index]
+                for char in current_line[self.typing_index:self.typing_index + self.typing_speed]:
+                    # Max blending copies the glyph's pixels as they are onto the transparent line, alpha included
+                    if not char.isspace():
+                        surface.blit(self.atlas.glyph(char), (self.pen_x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+                    self.pen_x += self.atlas.advance(char)
+                    self.typing_index += 1
             else:
                 # Move to the next line
                 self.current_line_index += 1
                 self.typing_index = 0
-                self.current_text = ""
+                self.pen_x = 0
         else:
             self.finished = True  # Typing is complete
 
@@ -56,20 +156,17 @@ class TextDisplay:
             return
 
         x, y = self.position
+        line_height = self.font.get_height() + self.line_spacing
 
-        # Render all completed lines
-        for i in range(self.current_line_index):
-            text_surface = self.font.render(self.lines[i], True, WHITE)
-            self.screen.blit(text_surface, (x, y + i * (self.font.get_height() + self.line_spacing)))
-
-        # Render the progressively typed current line
-        if self.current_line_index < len(self.lines):
-            text_surface = self.font.render(self.current_text, True, WHITE)
-            self.screen.blit(text_surface, (x, y + self.current_line_index * (self.font.get_height() + self.line_spacing)))
+        # Completed lines and the one being typed, whose glyphs are blitted as they are typed
+        for i in range(min(self.current_line_index + 1, len(self.lines))):
+            self.screen.blit(self.line_surfaces[i], (x, y + i * line_height))
 
     def reset(self):
         """Reset the typing progress."""
         self.current_line_index = 0
-        self.current_text = ""
         self.typing_index = 0
+        self.pen_x = 0
         self.finished = False
+        for surface in self.line_surfaces:
+            surface.fill((0, 0, 0, 0))
@@ -0,0 +1,63 @@
+from utils.settings import *
+from utils.fonts import fonts
+
+class ButtonRenderer:
+    def __init__(self, step = 0.05, max_surfaces = 512):
+        """
+        Scaled button textures and labels for the menus. Hover animations ease the scale of a button a little
+        every frame, so the scale is rounded to a multiple of step first. An animation then only goes through
+        a handful of sizes, each scaled or rendered once, and a button at rest is drawn from cached surfaces.
+
+        :param step: Scale steps the animations are rounded to.
+        :param max_surfaces: Number of cached surfaces above which the cache is emptied ( e.g. after many window resizes ).
+        """
+        self.step = step
+        self.max_surfaces = max_surfaces
+        self.surfaces = {}
+
+    def quantize(self, scale):
+        """Round an animation scale to the closest step."""
+        # Rounded again so a step like 1.35 is the same float as the literal, and sizes match the unrounded scale at rest
+        return round(round(scale / self.step) * self.step, 6)
+
+    def scaled(self, size, scale):
+        """Size of a button of the given size, at the step closest to scale."""
+        scale = self.quantize(scale)
+        return int(size[0] * scale), int(size[1] * scale)
+
+    def cached(self, key, build):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            if len(self.surfaces) >= self.max_surfaces:
+                self.surfaces.clear()
+            surface = build()
+            self.surfaces[key] = surface
+        return surface
+
+    def texture(self, texture, size):
+        """Button texture scaled to size."""
+        size = (max(0, size[0]), max(0, size[1]))
+        return self.cached(("texture", texture, size), lambda: pygame.transform.scale(texture, size))
+
+    def label(self, text, font_size, color = WHITE, upscale = 1):
+        """
+        Text of a button, rendered with the default font.
+
+        :param upscale: Smooth scale factor applied to the rendered text ( the menus draw slightly blurred, bigger text ).
+        """
+        font_size = max(1, font_size)
+        if upscale == 1:
+            return fonts.render(text, font_size, color)
+
+        def build():
+            surface = fonts.render(text, font_size, color)
+            size = (int(surface.get_width() * upscale), int(surface.get_height() * upscale))
+            return pygame.transform.smoothscale(surface, size)
+
+        return self.cached(("label", text, font_size, tuple(color), upscale), build)
+
+    def clear(self):
+        self.surfaces.clear()
+
+# Shared by every menu
+button_renderer = ButtonRenderer()
@@ -3,7 +3,11 @@ import sys
 import os
 import json
 from utils.settings import *
+from utils.assets import assets
+from utils.tracing import traced
+from utils.fonts import fonts
 from ui.animatedtext import TextDisplay
+from ui.buttons import button_renderer
 
 
 class LoadGame:
@@ -14,21 +18,19 @@ class LoadGame:
         self.back = False
         self.getoldsave = False
 
-        self.background_image_original = pygame.image.load("../assets/graphics/tilesets/new_background.png").convert()
+        self.background_image_original = assets.image("../assets/graphics/tilesets/new_background.png", alpha = False)
 
         self.saved_games_dir = "saved_games"
 
-        texture_image = pygame.image.load("../assets/graphics/tilesets/extra.png").convert_alpha()
-        
         texture_coords_gray = (0, 256, 128, 128)
         texture_coords_bronze = (320, 256, 128, 128)
         texture_coords_delete_bronze = (515, 190, 64, 64)
 
-        self.button_texture_gray = texture_image.subsurface(pygame.Rect(*texture_coords_gray))
-        self.button_texture_bronze = texture_image.subsurface(pygame.Rect(*texture_coords_bronze))
-        self.button_texture_delete_bronze = texture_image.subsurface(pygame.Rect(*texture_coords_delete_bronze))
+        self.button_texture_gray = assets.subsurface("../assets/graphics/tilesets/extra.png", texture_coords_gray)
+        self.button_texture_bronze = assets.subsurface("../assets/graphics/tilesets/extra.png", texture_coords_bronze)
+        self.button_texture_delete_bronze = assets.subsurface("../assets/graphics/tilesets/extra.png", texture_coords_delete_bronze)
 
-        self.font = pygame.font.Font(None, 40)
+        self.font = fonts.get(40)
         self.text_color = WHITE
         self.hover_scale = 1.35
         self.default_scale = 1.0
@@ -74,7 +76,7 @@ class LoadGame:
         self.screen.blit(self.background_image_original, (0, 0))
 
         if not self.saved_game_buttons:
-            no_games_text = self.font.render("No saved games available.", True, WHITE)
+            no_games_text = button_renderer.label("No saved games available.", 40, WHITE)
             text_rect = no_games_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
             self.screen.blit(no_games_text, text_rect)
             return
@@ -94,7 +96,8 @@ class LoadGame:
             button["hover_scale"] += (target_scale - button["hover_scale"]) * 0.2
             button["y_offset"] += (target_offset - button["y_offset"]) * 0.2
 
-            hover_scale = button["hover_scale"]
+            # Rounded, so the surfaces below come from the cache
+            hover_scale = button_renderer.quantize(button["hover_scale"])
             y_offset = button["y_offset"]
 
             shake_offset = 0
@@ -115,14 +118,14 @@ class LoadGame:
             )
 
             texture = (
-                pygame.transform.scale(self.button_texture_bronze, (scaled_width, scaled_height))
+                button_renderer.texture(self.button_texture_bronze, (scaled_width, scaled_height))
                 if is_back_button
-                else pygame.transform.scale(self.button_texture_gray, (scaled_width, scaled_height))
+                else button_renderer.texture(self.button_texture_gray, (scaled_width, scaled_height))
             )
             self.screen.blit(texture, button_rect)
 
             text_color = (184, 115, 51) if is_back_button else WHITE
-            text = self.font.render(button["label"], True, text_color)
+            text = button_renderer.label(button["label"], 40, text_color)
             text_rect = text.get_rect(center=button_rect.center)
             self.screen.blit(text, text_rect)
 
@@ -138,7 +141,7 @@ class LoadGame:
                     delete_button_size,
                 )
 
-                delete_texture = pygame.transform.scale(self.button_texture_delete_bronze, (delete_button_size, delete_button_size))
+                delete_texture = button_renderer.texture(self.button_texture_delete_bronze, (delete_button_size, delete_button_size))
                 self.screen.blit(delete_texture, delete_button_rect)
                 button["delete_rect"] = delete_button_rect
 
@@ -206,6 +209,7 @@ class LoadGame:
         except Exception as e:
             print(f"Error deleting game {save_file}: {e}")
 
+    @traced("LoadGame.run")
     def run(self):
         self.__init__(self.screen, self.level_manager)
 
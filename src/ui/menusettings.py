@@ -1,4 +1,8 @@
 from utils.settings import *
+from utils.assets import assets
+from utils.tracing import traced
+from utils.fonts import fonts
+from ui.buttons import button_renderer
 
 # Define constants for better maintainability
 BUTTON_FONT_SIZE = 40
@@ -19,19 +23,17 @@ class SettingsMenu:
         self.clock = pygame.time.Clock()
 
         # Font and colors
-        self.font = pygame.font.Font(None, BUTTON_FONT_SIZE)
+        self.font = fonts.get(BUTTON_FONT_SIZE)
         self.text_color = BLACK
         self.button_color = WHITE
         self.hover_color = GRAY
 
-        texture_image = pygame.image.load("../assets/graphics/tilesets/extra.png").convert_alpha()
-
-        self.background_image_original = pygame.image.load("../assets/graphics/tilesets/new_background.png").convert()
+        self.background_image_original = assets.image("../assets/graphics/tilesets/new_background.png", alpha = False)
         texture_coords = (0, 256, 128, 128)
 
-        self.button_texture_gray = texture_image.subsurface(pygame.Rect(*texture_coords))
+        self.button_texture_gray = assets.subsurface("../assets/graphics/tilesets/extra.png", texture_coords)
         # Preload resources
-        self.background_image_original = pygame.image.load("../assets/graphics/tilesets/new_background.png").convert()
+        self.background_image_original = assets.image("../assets/graphics/tilesets/new_background.png", alpha = False)
 
         # Button properties
         self.hover_scale = HOVER_SCALE
@@ -64,9 +66,6 @@ class SettingsMenu:
         # Pre-render static text surfaces
         self.pre_render_text()
 
-        # Initialize cache for scaled text and shadows
-        self.scaled_text_cache = {label: {} for label in self.button_list}
-
         # Calculate button sizes initially
         self.recalculate_button_sizes()
 
@@ -81,7 +80,7 @@ class SettingsMenu:
         """Pre-render the text surfaces for each button to optimize performance."""
         self.text_surfaces = {}
         for label in self.button_list:
-            text_surface = self.font.render(label, True, WHITE)
+            text_surface = fonts.render(label, BUTTON_FONT_SIZE, WHITE)
             self.text_surfaces[label] = text_surface
 
     def recalculate_button_sizes(self):
@@ -101,6 +100,7 @@ class SettingsMenu:
                 button_height,
             )
 
+    @traced("SettingsMenu.run")
     def run(self):
         """Main loop for the settings menu."""
         self.__init__(self.screen)
@@ -161,9 +161,8 @@ class SettingsMenu:
             data["hover_scale"] += (target_hover_scale - hover_scale) * self.animation_speed
             data["y_offset"] += (target_y_offset - y_offset) * self.animation_speed
 
-            # Calculate scaled rectangle
-            scaled_width = int(rect.width * data["hover_scale"])
-            scaled_height = int(rect.height * data["hover_scale"])
+            # Calculate scaled rectangle ( the scale is rounded, so the surfaces below come from the cache )
+            scaled_width, scaled_height = button_renderer.scaled(rect.size, data["hover_scale"])
             scaled_rect = pygame.Rect(
                 screen_center[0] - scaled_width // 2,
                 screen_center[1] + data["y_offset"] - scaled_height // 2,
@@ -172,7 +171,7 @@ class SettingsMenu:
             )
 
             # Draw button texture
-            scaled_texture = pygame.transform.scale(self.button_texture_gray, (scaled_width, scaled_height))
+            scaled_texture = button_renderer.texture(self.button_texture_gray, (scaled_width, scaled_height))
             self.screen.blit(scaled_texture, scaled_rect)
 
             # Draw text with shadow for buttons
@@ -180,8 +179,8 @@ class SettingsMenu:
 
     def draw_text_with_shadow(self, label, scaled_rect):
         """Helper method to draw text with a shadow effect for buttons."""
-        # Get hover_scale for the label
-        hover_scale = self.buttons[label]["hover_scale"]
+        # Get hover_scale for the label, rounded like the button
+        hover_scale = button_renderer.quantize(self.buttons[label]["hover_scale"])
 
         # Calculate scaled font size
         scaled_font_size = int(BUTTON_FONT_SIZE * hover_scale)
@@ -189,31 +188,9 @@ class SettingsMenu:
         # Ensure font size is at least 1
         scaled_font_size = max(1, scaled_font_size)
 
-        # Check if the scaled font size is already in cache
-        if scaled_font_size not in self.scaled_text_cache[label]:
-            # Create a new font for the scaled size
-            try:
-                scaled_font = pygame.font.Font(None, scaled_font_size)
-            except:
-                # Fallback in case the font size is invalid
-                scaled_font = self.font
-
-            # Render the text
-            text_surface = scaled_font.render(label, True, WHITE)
-
-            # Scale the text surface
-            up_width = int(text_surface.get_width() * TEXT_SCALE_FACTOR)
-            up_height = int(text_surface.get_height() * TEXT_SCALE_FACTOR)
-            text_upscaled = pygame.transform.smoothscale(text_surface, (up_width, up_height))
-
-            # Render the shadow
-            shadow_surface = scaled_font.render(label, True, (0, 0, 0))
-            shadow_upscaled = pygame.transform.smoothscale(shadow_surface, (up_width, up_height))
-
-            # Store in cache
-            self.scaled_text_cache[label][scaled_font_size] = (text_upscaled, shadow_upscaled)
-        else:
-            text_upscaled, shadow_upscaled = self.scaled_text_cache[label][scaled_font_size]
+        # Text and shadow, rendered and upscaled once per font size
+        text_upscaled = button_renderer.label(label, scaled_font_size, WHITE, TEXT_SCALE_FACTOR)
+        shadow_upscaled = button_renderer.label(label, scaled_font_size, BLACK, TEXT_SCALE_FACTOR)
 
         # Position the shadow
         shadow_rect = shadow_upscaled.get_rect(
@@ -227,17 +204,9 @@ class SettingsMenu:
 
     def draw_slider_label(self, label, scaled_rect):
         """Helper method to draw slider labels with a shadow effect."""
-        # Render the slider label text
-        text_surface = self.font.render(label, True, WHITE)
-
-        # Scale the text surface
-        up_width = int(text_surface.get_width() * TEXT_SCALE_FACTOR)
-        up_height = int(text_surface.get_height() * TEXT_SCALE_FACTOR)
-        text_upscaled = pygame.transform.smoothscale(text_surface, (up_width, up_height))
-
-        # Render the shadow
-        shadow_surface = self.font.render(label, True, (0, 0, 0))
-        shadow_upscaled = pygame.transform.smoothscale(shadow_surface, (up_width, up_height))
+        # Render the slider label text and its shadow ( one of the hundred percentages, cached )
+        text_upscaled = button_renderer.label(label, BUTTON_FONT_SIZE, WHITE, TEXT_SCALE_FACTOR)
+        shadow_upscaled = button_renderer.label(label, BUTTON_FONT_SIZE, BLACK, TEXT_SCALE_FACTOR)
 
         # Position the shadow
         shadow_rect = shadow_upscaled.get_rect(
@@ -397,4 +366,3 @@ class SettingsMenu:
         del self.clock
         self.buttons.clear()
         self.text_surfaces.clear()
-        self.scaled_text_cache.clear()
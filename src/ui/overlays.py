@@ -0,0 +1,77 @@
+from collections import deque
+from utils.settings import *
+
+class ArrowOverlay:
+    def __init__(self, screen, points, duration=1.5, color=WHITE):
+        """
+        A filled polygon ( e.g. an arrow pointing at part of the HUD ) shown for a while.
+
+        :param screen: The screen surface where the polygon will be drawn.
+        :param points: Points of the polygon, in screen coordinates.
+        :param duration: Time (in seconds) the polygon stays on screen.
+        :param color: Fill color of the polygon.
+        """
+        self.screen = screen
+        self.points = points
+        self.duration = duration
+        self.color = color
+        self.elapsed = 0
+        self.active = False
+
+    def start(self):
+        self.active = True
+        self.elapsed = 0
+
+    def update(self, dt):
+        self.elapsed += dt
+        if self.elapsed >= self.duration:
+            self.active = False
+
+    def skip(self):
+        self.active = False
+
+    def render(self):
+        if self.active:
+            pygame.draw.polygon(self.screen, self.color, self.points)
+
+class OverlayQueue:
+    def __init__(self):
+        """
+        Overlays ( text boxes, arrows ) shown over the level one after another. They are advanced by the
+        simulation steps and drawn after the level every frame, so the game keeps running underneath them.
+
+        An overlay has start(), update(dt), skip() and render() methods and an active flag, cleared when it is done.
+        """
+        self.pending = deque()
+        self.current = None
+
+    def push(self, overlay):
+        """Show an overlay once the ones before it are done."""
+        self.pending.append(overlay)
+
+    def update(self, dt):
+        if self.current is not None and not self.current.active:
+            self.current = None
+        if self.current is None and self.pending:
+            self.current = self.pending.popleft()
+            self.current.start()
+
+        if self.current is not None:
+            self.current.update(dt)
+
+    # Skip the overlay on screen ( Enter )
+    def skip(self):
+        if self.current is not None:
+            self.current.skip()
+
+    def draw(self):
+        if self.current is not None:
+            self.current.render()
+
+    def clear(self):
+        self.pending.clear()
+        self.current = None
+
+    @property
+    def active(self):
+        return self.current is not None or bool(self.pending)
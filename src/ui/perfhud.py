@@ -0,0 +1,124 @@
+from array import array
+from utils.settings import *
+from utils.fonts import fonts
+
+class RingBuffer:
+    def __init__(self, size):
+        """
+        Last size values of a measure, in a preallocated array, so recording a value never allocates.
+
+        :param size: Number of values kept.
+        """
+        self.values = array("d", bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0
+
+    def push(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def average(self):
+        return sum(self.values[:self.count]) / self.count if self.count else 0
+
+    def maximum(self):
+        return max(self.values[:self.count]) if self.count else 0
+
+class PerfHud:
+    # Measures recorded every frame
+    MEASURES = ("frame", "update", "draw", "collision", "blits")
+
+    def __init__(self, size = 120, refresh_time = 250):
+        """
+        Performance overlay, toggled with F3. Measures are always recorded ( that is cheap ),
+        the text is only rendered while the overlay is visible, and at most every refresh_time.
+
+        :param size: Number of frames the averages and maximums are taken over.
+        :param refresh_time: Time between two refreshes of the text, in milliseconds.
+        """
+        self.visible = False
+        self.refresh_time = refresh_time
+        self.buffers = {name: RingBuffer(size) for name in self.MEASURES}
+        self.current = {name: 0 for name in self.MEASURES}
+
+        # The panel is rendered on refresh and blitted as is every frame
+        self.font = None
+        self.panel = None
+        self.last_refresh = 0
+
+        # Rendered lines, so a line whose numbers didn't change isn't rendered again
+        self.line_cache = {}
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.panel = None
+
+    # Add to a measure of the current frame ( e.g. collision, which runs several times per frame )
+    def add(self, name, value):
+        self.current[name] += value
+
+    def end_frame(self):
+        for name in self.MEASURES:
+            self.buffers[name].push(self.current[name])
+            self.current[name] = 0
+
+    def render_line(self, text):
+        surface = self.line_cache.get(text)
+        if surface is None:
+            # Lines change all the time, keep the cache from growing forever
+            if len(self.line_cache) > 256:
+                self.line_cache.clear()
+            surface = self.font.render(text, True, WHITE)
+            self.line_cache[text] = surface
+        return surface
+
+    def build_lines(self, level):
+        lines = []
+        for name, label in (("frame", "frame"), ("update", "update"), ("draw", "draw"), ("collision", "collision")):
+            buffer = self.buffers[name]
+            lines.append(f"{label:<10} {buffer.average():6.2f} ms  max {buffer.maximum():6.2f}")
+        lines.append(f"blits      {self.buffers['blits'].average():6.0f}")
+
+        # Sprites per Z layer ( baked chunks are counted apart )
+        all_sprites = level.all_sprites
+        names = {z: name for name, z in Z_LAYERS.items()}
+        for z, sprites in all_sprites.layers.items():
+            chunks = len(all_sprites.chunks[z]) if z in all_sprites.chunks else 0
+            if sprites or chunks:
+                lines.append(f"{names[z]:<10} {len(sprites):3} sprites {chunks:3} chunks")
+
+        if pygame.mixer.get_init():
+            channels = pygame.mixer.get_num_channels()
+            busy = sum(1 for index in range(channels) if pygame.mixer.Channel(index).get_busy())
+            lines.append(f"audio      {busy}/{channels} channels")
+
+        # The HUD renders its own lines, so they don't count here
+        text = fonts.stats()
+        lines.append(f"text       {text['text_hits']} hits {text['text_misses']} misses")
+        return lines
+
+    def draw(self, surface, level):
+        if not self.visible:
+            return
+
+        now = pygame.time.get_ticks()
+        if self.panel is None or now - self.last_refresh >= self.refresh_time:
+            if self.font is None:
+                self.font = pygame.font.SysFont("monospace", 14)
+
+            line_surfaces = [self.render_line(line) for line in self.build_lines(level)]
+            width = max(line.get_width() for line in line_surfaces) + 20
+            height = sum(line.get_height() for line in line_surfaces) + 20
+            self.panel = pygame.Surface((width, height), pygame.SRCALPHA)
+            self.panel.fill((0, 0, 0, 160))
+            y = 10
+            for line in line_surfaces:
+                self.panel.blit(line, (10, y))
+                y += line.get_height()
+            self.last_refresh = now
+
+        surface.blit(self.panel, (surface.get_width() - self.panel.get_width() - 10, 10))
+
+# Shared by the game loop and the code it measures
+perf_hud = PerfHud()
@@ -1,7 +1,11 @@
 import os, json
 from os.path import join
 from utils.settings import *
+from utils.assets import assets
+from utils.tracing import traced
+from utils.fonts import fonts
 from ui.menusettings import *
+from ui.buttons import button_renderer
 #
 # Sub-Overlay Class for "Exit Game"
 # with "Save Game?" or "Don't Save"
@@ -23,17 +27,15 @@ class ExitPopup:
         self.default_scale = 1.0
 
         self.clock = clock
-        self.font = pygame.font.Font(None, 36)
+        self.font = fonts.get(36)
 
         # Load texture surface
-        texture_image_surface = pygame.image.load("../assets/graphics/tilesets/terrain.png").convert_alpha()
         texture_coords_surface = (0, 0, 190, 190)  # Adjust as needed
-        self.texture_surface = texture_image_surface.subsurface(pygame.Rect(*texture_coords_surface))
+        self.texture_surface = assets.subsurface("../assets/graphics/tilesets/terrain.png", texture_coords_surface)
 
         # Load button textures
-        texture_image = pygame.image.load("../assets/graphics/tilesets/extra.png").convert_alpha()
         button_texture_coords = (0, 256, 128, 128)  # Adjust as needed
-        self.button_texture = texture_image.subsurface(pygame.Rect(*button_texture_coords))
+        self.button_texture = assets.subsurface("../assets/graphics/tilesets/extra.png", button_texture_coords)
 
         # Buttons: "Save Game?" + "Don't Save"
         self.buttons = {
@@ -63,6 +65,7 @@ class ExitPopup:
 
         print(f"Game saved in {save_filename}!")
 
+    @traced("ExitPopup.run")
     def run(self, screen, save_info):
         self.screen = screen
         self.active = True
@@ -116,7 +119,7 @@ class ExitPopup:
         # Scale and center the texture surface
         cw = int(self.overlay_width)
         ch = int(self.overlay_height)
-        scaled_surface = pygame.transform.scale(self.texture_surface, (cw, ch))
+        scaled_surface = button_renderer.texture(self.texture_surface, (cw, ch))
         cx = self.screen.get_width() // 2
         cy = self.screen.get_height() // 2
 
@@ -139,24 +142,22 @@ class ExitPopup:
             else:
                 target_scale = self.default_scale  # Default size
 
-            # Smoothly adjust the hover scale
+            # Smoothly adjust the hover scale ( rounded, so the surfaces below come from the cache )
             data["hover_scale"] += (target_scale - hover_scale) * self.animation_speed
-            new_scale = data["hover_scale"]
+            new_scale = button_renderer.quantize(data["hover_scale"])
 
             # Calculate the new button size
-            sw = int(rect.width * new_scale)
-            sh = int(rect.height * new_scale)
+            sw, sh = button_renderer.scaled(rect.size, new_scale)
             scaled_rect = pygame.Rect(0, 0, sw, sh)
             scaled_rect.center = rect.center
 
             # Draw the button texture (scaled)
-            texture = pygame.transform.scale(data["texture"], (sw, sh))
+            texture = button_renderer.texture(data["texture"], (sw, sh))
             self.screen.blit(texture, scaled_rect)
 
             # Render and draw the button label text
             font_size = int(36 * new_scale)  # Dynamically adjust font size
-            text_font = pygame.font.Font(None, font_size)
-            text_surf = text_font.render(label, True, (255, 255, 255))  # White color for text
+            text_surf = button_renderer.label(label, font_size, WHITE)  # White color for text
             text_rect = text_surf.get_rect(center=scaled_rect.center)  # Center the text on the button
 
             # Draw the text on top of the button
@@ -209,19 +210,17 @@ class SaveGame:
         self.default_scale = 1.0
 
         self.active = True
-        self.font = pygame.font.Font(None, 36)
+        self.font = fonts.get(36)
 
         # Load texture surface (same as ExitPopup)
-        texture_image_surface = pygame.image.load("../assets/graphics/tilesets/terrain.png").convert_alpha()
         texture_coords_surface = (0, 0, 190, 190)
-        self.texture_surface = texture_image_surface.subsurface(pygame.Rect(*texture_coords_surface))
+        self.texture_surface = assets.subsurface("../assets/graphics/tilesets/terrain.png", texture_coords_surface)
 
         # Load button textures
-        texture_image = pygame.image.load("../assets/graphics/tilesets/extra.png").convert_alpha()
         texture_coords_gray = (0, 256, 128, 128)
         texture_coords_bronze = (320, 256, 128, 128)
-        self.button_texture_gray = texture_image.subsurface(pygame.Rect(*texture_coords_gray))
-        self.button_texture_bronze = texture_image.subsurface(pygame.Rect(*texture_coords_bronze))
+        self.button_texture_gray = assets.subsurface("../assets/graphics/tilesets/extra.png", texture_coords_gray)
+        self.button_texture_bronze = assets.subsurface("../assets/graphics/tilesets/extra.png", texture_coords_bronze)
 
         # The main overlay buttons
         self.buttons = {
@@ -242,6 +241,7 @@ class SaveGame:
         self.selected_button_index = 0
         self.screen = None
 
+    @traced("SaveGame.run")
     def run(self, screen, save_info):
         """
         Main overlay with "Settings", "Exit Game", "Continue"
@@ -303,16 +303,14 @@ class SaveGame:
 
             # Adjust text for "Exit Game"
             if label == "Exit Game":
-                text_font = pygame.font.Font(None, int(22))
                 text_color = (184, 115, 51)  # Bronze-like color
-                text_surf = text_font.render(label, True, text_color)
+                text_surf = button_renderer.label(label, 22, text_color)
                 text_rect = text_surf.get_rect(midleft=(rect.left + 40, rect.centery))  # Shift text
                 self.buttons[label]["text_rect"] = text_rect
                 self.buttons[label]["text_surf"] = text_surf
             else:
-                text_font = pygame.font.Font(None, 36)
                 text_color = WHITE
-                text_surf = text_font.render(label, True, text_color)
+                text_surf = button_renderer.label(label, 36, text_color)
                 text_rect = text_surf.get_rect(center=rect.center)
                 self.buttons[label]["text_rect"] = text_rect
                 self.buttons[label]["text_surf"] = text_surf
@@ -326,7 +324,7 @@ class SaveGame:
         # Scale and render the texture surface
         cw = int(self.overlay_width)
         ch = int(self.overlay_height)
-        scaled_surface = pygame.transform.scale(self.texture_surface, (cw, ch))
+        scaled_surface = button_renderer.texture(self.texture_surface, (cw, ch))
         cx = self.screen.get_width() // 2
         cy = self.screen.get_height() // 2
 
@@ -350,24 +348,22 @@ class SaveGame:
             else:
                 target_scale = self.default_scale  # Default size
 
-            # Smoothly adjust the hover scale
+            # Smoothly adjust the hover scale ( rounded, so the surfaces below come from the cache )
             data["hover_scale"] += (target_scale - hover_scale) * self.animation_speed
-            new_scale = data["hover_scale"]
+            new_scale = button_renderer.quantize(data["hover_scale"])
 
             # Calculate the new button size
-            sw = int(rect.width * new_scale)
-            sh = int(rect.height * new_scale)
+            sw, sh = button_renderer.scaled(rect.size, new_scale)
             scaled_rect = pygame.Rect(0, 0, sw, sh)
             scaled_rect.center = rect.center
 
             # Draw the button texture (scaled)
-            texture = pygame.transform.scale(data["texture"], (sw, sh))
+            texture = button_renderer.texture(data["texture"], (sw, sh))
             self.screen.blit(texture, scaled_rect)
 
             # Render and draw the button label text
             font_size = int(36 * new_scale)  # Dynamically adjust font size
-            text_font = pygame.font.Font(None, font_size)
-            text_surf = text_font.render(label, True, (255, 255, 255))  # White color for text
+            text_surf = button_renderer.label(label, font_size, WHITE)  # White color for text
             text_rect = text_surf.get_rect(center=scaled_rect.center)  # Center the text on the button
 
             # Draw the text on top of the button
@@ -1,6 +1,9 @@
 import sys
 import pygame
 from utils.settings import * 
+from utils.assets import assets
+from utils.tracing import traced
+from ui.buttons import button_renderer
 from ui.menusettings import SettingsMenu
 from ui.loadgame import LoadGame
 
@@ -11,19 +14,16 @@ class StartupScreen:
         self.active = True
         self.clock = clock
 
-        texture_image = pygame.image.load("../assets/graphics/tilesets/extra.png").convert_alpha()
-
         texture_coords = (0, 256, 128, 128)
 
-        self.button_texture_gray = texture_image.subsurface(pygame.Rect(*texture_coords))
+        self.button_texture_gray = assets.subsurface("../assets/graphics/tilesets/extra.png", texture_coords)
         # Preload resources
-        self.background_image_original = pygame.image.load("../assets/graphics/tilesets/new_background.png").convert()
+        self.background_image_original = assets.image("../assets/graphics/tilesets/new_background.png", alpha = False)
 
         # Scaled background placeholder
         self.background_image_scaled = None
 
         # Fonts
-        self.font_cache = {}
         self.base_font_size = 40
 
         # External screens
@@ -69,12 +69,7 @@ class StartupScreen:
         screen_size = self.screen.get_size()
         self.background_image_scaled = pygame.transform.scale(self.background_image_original, screen_size)
 
-    def get_font(self, size):
-        """Retrieve or create a font of a given size from the cache."""
-        if size not in self.font_cache:
-            self.font_cache[size] = pygame.font.Font(None, size)
-        return self.font_cache[size]
-
+    @traced("StartupScreen.run")
     def run(self):
         while self.active:
             self.handle_events()
@@ -111,12 +106,11 @@ class StartupScreen:
             data["hover_scale"] += (target_hover_scale - current_hover_scale) * self.animation_speed
             data["y_offset"] += (target_y_offset - current_y_offset) * self.animation_speed
 
-            # Apply scaling and position updates
-            hover_scale = data["hover_scale"]
+            # Apply scaling and position updates ( the scale is rounded, so the surfaces below come from the cache )
+            hover_scale = button_renderer.quantize(data["hover_scale"])
             y_offset = data["y_offset"]
 
-            scaled_width = int(rect.width * hover_scale)
-            scaled_height = int(rect.height * hover_scale)
+            scaled_width, scaled_height = button_renderer.scaled(rect.size, hover_scale)
             scaled_rect = pygame.Rect(
                 screen_center[0] - scaled_width // 2,
                 screen_center[1] + y_offset - scaled_height // 2,
@@ -125,23 +119,16 @@ class StartupScreen:
             )
 
             # Draw button texture from settings
-            scaled_texture = pygame.transform.scale(data["texture"], (scaled_width, scaled_height))
+            scaled_texture = button_renderer.texture(data["texture"], (scaled_width, scaled_height))
             self.screen.blit(scaled_texture, scaled_rect)
 
             # Render text with a slight upscale + shadow
             scaled_font_size = int(self.base_font_size * hover_scale)
-            text_font = self.get_font(scaled_font_size)
-
-            # Create the text surface
-            text_surface = text_font.render(label, True, (255, 255, 255))
             upscale_factor = 1.2
-            new_width = int(text_surface.get_width() * upscale_factor)
-            new_height = int(text_surface.get_height() * upscale_factor)
-            text_surface_upscaled = pygame.transform.smoothscale(text_surface, (new_width, new_height))
+            text_surface_upscaled = button_renderer.label(label, scaled_font_size, WHITE, upscale_factor)
 
             # Create a shadow version
-            text_shadow = text_font.render(label, True, (0, 0, 0))
-            text_shadow_upscaled = pygame.transform.smoothscale(text_shadow, (new_width, new_height))
+            text_shadow_upscaled = button_renderer.label(label, scaled_font_size, BLACK, upscale_factor)
 
             # Draw the shadow slightly offset
             shadow_offset = 2
@@ -1,12 +1,16 @@
 import pygame
-import time
 from utils.settings import *
+from utils.assets import assets
 from ui.animatedtext import *
 
+# Space kept between the text and the sides of the box, in pixels ( the texture's border is about as wide )
+TEXT_MARGIN = 40
+
 class TextBox:
-    def __init__(self, position, size, screen, clock, text, font, fade_time=4):
+    def __init__(self, position, size, screen, text, font, fade_time=4):
         """
-        Initialize the TextBox class.
+        Initialize the TextBox class. The box is shown through an OverlayQueue, which starts,
+        updates and draws it as part of the game loop.
 
         :param position: Tuple (x, y) for the top-left corner of the box.
         :param size: Tuple (width, height) of the box.
@@ -18,30 +22,39 @@ class TextBox:
         self.position = position
         self.size = size
         self.screen = screen
-        self.text_display = TextDisplay(position, text, font, screen)
-        self.start_time = time.time()
+        self.text_display = TextDisplay(position, text, font, screen, max_width=size[0] - 2 * TEXT_MARGIN)
+        self.active = False
+        self.elapsed = 0
         self.fade_time = fade_time
         self.alpha = 255
+        self.gamma = 255
         self.surface = pygame.Surface(size)
         self.surface.set_alpha(self.alpha)
         self.surface.fill(BLACK)
-        self.clock = clock
 
-        texture_image = pygame.image.load("../assets/graphics/tilesets/extra.png").convert_alpha()
         texture_coords_gray = (0, 0, 192, 192)
-        self.button_texture_gray = texture_image.subsurface(pygame.Rect(*texture_coords_gray))
+        self.button_texture_gray = assets.subsurface("../assets/graphics/tilesets/extra.png", texture_coords_gray)
+
+        # The texture is scaled to the box once. Fading draws self.surface ( plain black ) on top of it,
+        # with an alpha of 255 - gamma, which darkens the box and the text as much as multiplying them by gamma
+        self.background = pygame.transform.scale(self.button_texture_gray, self.size)
+
+        # The text display types the lines onto its own surfaces, the box only centers them
+        self.line_height = font.get_height() + self.text_display.line_spacing
+
     def start(self):
         """Start displaying the text box."""
-        self.start_time = time.time()
-
-    def update(self):
-        """Update the text box and fade out if necessary."""
-        self.handle_skip()
+        self.active = True
+        self.elapsed = 0
+        self.gamma = 255
 
-        if self.start_time is None:
+    def update(self, dt):
+        """Advance the text box by dt seconds and fade out if necessary."""
+        if not self.active:
             return
 
-        elapsed_time = time.time() - self.start_time
+        self.elapsed += dt
+        elapsed_time = self.elapsed
 
         # Calculate fade ratio for gamma adjustment
         if elapsed_time <= self.fade_time:
@@ -57,68 +70,46 @@ class TextBox:
 
     def render(self):
         """Render the text box and center the animated text with gamma fading."""
-        if self.start_time is None or self.gamma == 0:
+        if not self.active or self.gamma == 0:
             return
 
-        # Scale the texture to match the size of the box
-        scaled_texture = pygame.transform.scale(self.button_texture_gray, self.size)
-        faded_texture = pygame.Surface(self.size).convert_alpha()
-        faded_texture.blit(scaled_texture, (0, 0))
-        faded_texture.fill((self.gamma, self.gamma, self.gamma), special_flags=pygame.BLEND_RGBA_MULT)
-
-        # Draw the textured box with gamma fading
-        self.screen.blit(faded_texture, self.position)
+        # Draw the textured box
+        self.screen.blit(self.background, self.position)
 
         # Render the animated text line by line, centered in the box
         x, y = self.position
         box_width, box_height = self.size
-        total_text_height = len(self.text_display.lines) * (self.text_display.font.get_height() + self.text_display.line_spacing)
+        total_text_height = len(self.text_display.lines) * self.line_height
 
         # Start vertical alignment
         start_y = y + (box_height - total_text_height) // 2
 
         for i in range(self.text_display.current_line_index):
-            line_surface = self.text_display.font.render(self.text_display.lines[i], True, (self.gamma, self.gamma, self.gamma))
-            line_rect = line_surface.get_rect(center=(x + box_width // 2, start_y + i * (self.text_display.font.get_height() + self.text_display.line_spacing)))
+            line_surface = self.text_display.line_surfaces[i]
+            line_rect = line_surface.get_rect(center=(x + box_width // 2, start_y + i * self.line_height))
             self.screen.blit(line_surface, line_rect)
-            self.handle_skip()
 
-        # Render the animated part of the current line
-        if self.text_display.current_line_index < len(self.text_display.lines):
-            current_surface = self.text_display.font.render(self.text_display.current_text, True, (self.gamma, self.gamma, self.gamma))
-            current_rect = current_surface.get_rect(center=(x + box_width // 2, start_y + self.text_display.current_line_index * (self.text_display.font.get_height() + self.text_display.line_spacing)))
-            self.screen.blit(current_surface, current_rect)
-            self.handle_skip()
+        # Render the animated part of the current line. The rest of its surface is still transparent,
+        # so it is placed to center the part typed so far
+        index = self.text_display.current_line_index
+        if index < len(self.text_display.lines) and self.text_display.typing_index:
+            line_surface = self.text_display.line_surfaces[index]
+            current_rect = line_surface.get_rect(center=(x + box_width // 2, start_y + index * self.line_height))
+            current_rect.left = x + box_width // 2 - self.text_display.pen_x // 2
+            self.screen.blit(line_surface, current_rect)
+
+        # Fade the box and the text together
+        if self.gamma < 255:
+            self.surface.set_alpha(255 - self.gamma)
+            self.screen.blit(self.surface, self.position)
 
 
-    def handle_skip(self):
-        for event in pygame.event.get():
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    self.reset()
+    def skip(self):
+        """Hide the text box before it has faded out ( Enter )."""
+        self.reset()
 
     def reset(self):
         """Reset the text box and hide it."""
         self.active = False
-        self.start_time = None
         self.alpha = 255
         self.text_display.reset()
-
-    def run(self):
-        """Run the text box, displaying it and stopping after fade_time."""
-        self.start()
-        self.active = True
-
-        while self.active:
-            self.handle_skip()
-            self.update()
-            self.render()
-
-            if not self.active:
-                break 
-            # Stop the loop after fade_time has elapsed
-            if time.time() - self.start_time >= self.fade_time:
-                self.active = False
-
-            pygame.display.flip()
-            self.clock.tick(FPS)  # Limit the frame rate
\ No newline at end of file
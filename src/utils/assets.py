@@ -0,0 +1,161 @@
+import threading
+from collections import OrderedDict
+from os.path import normpath
+from pytmx.util_pygame import handle_transformation, smart_convert  # type: ignore
+from utils.settings import *
+
+class AssetRegistry:
+    def __init__(self, max_bytes = 64 * 1024 * 1024):
+        """
+        Decode and convert every image once, then hand out the same surfaces to everyone asking for them.
+        Least recently used images are evicted once the cache holds more than max_bytes of pixel data.
+
+        :param max_bytes: Memory budget for the cached surfaces.
+        """
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        # Images decoded ahead of time by prefetch(), waiting to be converted on the main thread
+        self.decoded = {}
+        self.decoded_lock = threading.Lock()
+
+    # Cached entry of an image file, loaded on the first request
+    def get_entry(self, path, alpha):
+        key = (normpath(path), alpha)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry
+
+        self.misses += 1
+        with self.decoded_lock:
+            surface = self.decoded.pop(normpath(path), None)
+        if surface is None:
+            surface = pygame.image.load(path)
+        surface = surface.convert_alpha() if alpha else surface.convert()
+        entry = {"surface": surface, "derived": {}, "bytes": self.surface_bytes(surface)}
+        self.entries[key] = entry
+        self.bytes += entry["bytes"]
+        self.evict()
+        return entry
+
+    # Surfaces made from an image ( subsurfaces, converted tiles ) live and die with it
+    def get_derived(self, entry, key, build):
+        derived = entry["derived"]
+        if key in derived:
+            self.hits += 1
+            return derived[key]
+
+        self.misses += 1
+        value = build(entry["surface"])
+        derived[key] = value
+        size = self.derived_bytes(value)
+        entry["bytes"] += size
+        self.bytes += size
+        return value
+
+    def surface_bytes(self, surface):
+        return surface.get_pitch() * surface.get_height()
+
+    # Subsurfaces share their parent's pixels, so only real copies count towards the budget
+    def derived_bytes(self, value):
+        if isinstance(value, dict):
+            return sum(self.derived_bytes(item) for item in value.values())
+        if isinstance(value, (list, tuple)):
+            return sum(self.derived_bytes(item) for item in value)
+        return self.surface_bytes(value) if value.get_parent() is None else 0
+
+    def evict(self):
+        # Never evict the most recent entry, it is about to be used
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            key, entry = self.entries.popitem(last = False)
+            self.bytes -= entry["bytes"]
+
+    def prefetch(self, path):
+        """Decode an image file without converting it, so it can run on a worker thread. The main thread converts it on first use."""
+        key = normpath(path)
+        with self.decoded_lock:
+            if key in self.decoded or (key, True) in self.entries or (key, False) in self.entries:
+                return
+        surface = pygame.image.load(path)
+        with self.decoded_lock:
+            self.decoded[key] = surface
+
+    def drop_prefetched(self):
+        """Forget the images decoded ahead of time and not used yet ( e.g. those of a prefetched level that wasn't loaded )."""
+        with self.decoded_lock:
+            self.decoded.clear()
+
+    def image(self, path, alpha = True):
+        """Shared surface of an image file. Don't draw on it, copy it first."""
+        return self.get_entry(path, alpha)["surface"]
+
+    def subsurface(self, path, rect, alpha = True):
+        """Shared subsurface of an image file, e.g. a single button out of a texture sheet."""
+        rect = pygame.Rect(rect)
+        return self.get_derived(self.get_entry(path, alpha), ("subsurface", tuple(rect)),
+                                lambda surface: surface.subsurface(rect))
+
+    def animations(self, path, frame_size, layout):
+        """
+        Animation frames of a sprite sheet, sliced and mirrored once and shared by every sprite using the sheet.
+
+        :param path: Path of the sprite sheet. Each row holds the frames of one animation.
+        :param frame_size: Width and height of a single frame.
+        :param layout: (animation name, frame count) pairs, in the order of the rows.
+        :return: {"right": {name: frames}, "left": {name: mirrored frames}}
+        """
+        frame_width, frame_height = frame_size
+        layout = tuple(layout)
+
+        def build(sheet):
+            atlas = {"right": {}, "left": {}}
+            for row, (name, frame_count) in enumerate(layout):
+                frames = [sheet.subsurface(pygame.Rect(col * frame_width, row * frame_height, frame_width, frame_height))
+                          for col in range(frame_count)]
+                atlas["right"][name] = frames
+                atlas["left"][name] = [pygame.transform.flip(frame, True, False) for frame in frames]
+            return atlas
+
+        return self.get_derived(self.get_entry(path, True), ("animations", (frame_width, frame_height), layout), build)
+
+    def tileset_loader(self, filename, colorkey, **kwargs):
+        """Image loader for pytmx, same output as pytmx.util_pygame.pygame_image_loader but cached across maps."""
+        if colorkey:
+            colorkey = pygame.Color("#{0}".format(colorkey))
+        pixelalpha = kwargs.get("pixelalpha", True)
+        entry = self.get_entry(filename, True)
+
+        def load_image(rect = None, flags = None):
+            def build(surface):
+                tile = surface.subsurface(rect) if rect else surface.copy()
+                if flags:
+                    tile = handle_transformation(tile, flags)
+                return smart_convert(tile, colorkey, pixelalpha)
+
+            key = ("tile", tuple(rect) if rect else None, tuple(flags) if flags else None, str(colorkey), pixelalpha)
+            return self.get_derived(entry, key, build)
+
+        return load_image
+
+    def clear(self):
+        self.entries.clear()
+        with self.decoded_lock:
+            self.decoded.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes": self.bytes,
+            "entries": len(self.entries),
+            "prefetched": len(self.decoded),
+        }
+
+# Shared by the whole game
+assets = AssetRegistry()
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from utils.settings import *
+
+class FontCache:
+    def __init__(self, max_surfaces = 512):
+        """
+        Fonts and rendered text shared by the whole game. A font is built once per (file, size),
+        and the last max_surfaces rendered strings are kept, least recently used first out.
+
+        :param max_surfaces: Number of rendered text surfaces kept.
+        """
+        self.max_surfaces = max_surfaces
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+
+        self.font_hits = 0
+        self.font_misses = 0
+        self.text_hits = 0
+        self.text_misses = 0
+
+    def get(self, size, name = None):
+        """
+        Shared font of the given size.
+
+        :param size: Size of the font.
+        :param name: Font file, the default pygame font if None.
+        """
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.font_hits += 1
+            return font
+
+        self.font_misses += 1
+        font = pygame.font.Font(name, size)
+        self.fonts[key] = font
+        return font
+
+    def render(self, text, size, color = WHITE, antialias = True, name = None):
+        """Shared surface of a rendered string. Don't draw on it, copy it first."""
+        key = (name, size, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.text_hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.text_misses += 1
+        surface = self.get(size, name).render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_surfaces:
+            self.surfaces.popitem(last = False)
+        return surface
+
+    def clear(self):
+        self.fonts.clear()
+        self.surfaces.clear()
+
+    def stats(self):
+        return {
+            "font_hits": self.font_hits,
+            "font_misses": self.font_misses,
+            "text_hits": self.text_hits,
+            "text_misses": self.text_misses,
+            "fonts": len(self.fonts),
+            "surfaces": len(self.surfaces),
+        }
+
+# Shared by the whole game
+fonts = FontCache()
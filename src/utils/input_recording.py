@@ -0,0 +1,112 @@
+import struct
+from utils.settings import *
+from utils.scripted_input import PLAYER_KEYS, KeyState, ScriptedInput
+
+# magic, version, planet index, level index, timestep ( seconds ), number of runs
+HEADER = struct.Struct("<4sHHHdI")
+MAGIC = b"SRIR"
+VERSION = 1
+
+# One run: how many steps in a row the same keys were held, and the keys as a bitmask of PLAYER_KEYS
+RUN = struct.Struct("<IB")
+
+def keys_to_mask(keys):
+    mask = 0
+    for bit, key in enumerate(PLAYER_KEYS):
+        if keys[key]:
+            mask |= 1 << bit
+    return mask
+
+# Only 2 ** len(PLAYER_KEYS) different key states exist, build each of them once
+MASK_KEY_STATES = [KeyState(key for bit, key in enumerate(PLAYER_KEYS) if mask & (1 << bit)) for mask in range(1 << len(PLAYER_KEYS))]
+
+class InputRecording:
+    def __init__(self, planet_index, level_index, timestep = SIMULATION_STEP, masks = None):
+        """
+        Keys held on every simulation step of a play session, and where the session started.
+
+        :param planet_index: Planet the session started on.
+        :param level_index: Level the session started on.
+        :param timestep: Duration of a simulation step, in seconds.
+        :param masks: Keys held on each step, as bitmasks of PLAYER_KEYS.
+        """
+        self.planet_index = planet_index
+        self.level_index = level_index
+        self.timestep = timestep
+        self.masks = bytearray(masks or ())
+
+    def __len__(self):
+        return len(self.masks)
+
+    # Consecutive steps with the same keys, as (count, mask)
+    def runs(self):
+        runs = []
+        for mask in self.masks:
+            if runs and runs[-1][1] == mask:
+                runs[-1][0] += 1
+            else:
+                runs.append([1, mask])
+        return runs
+
+    def save(self, path):
+        runs = self.runs()
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.planet_index, self.level_index, self.timestep, len(runs)))
+            for count, mask in runs:
+                file.write(RUN.pack(count, mask))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            data = file.read()
+
+        magic, version, planet_index, level_index, timestep, run_count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"'{path}' is not an input recording this game can read.")
+
+        masks = bytearray()
+        for count, mask in RUN.iter_unpack(data[HEADER.size:HEADER.size + run_count * RUN.size]):
+            masks += bytes((mask,)) * count
+        return cls(planet_index, level_index, timestep, masks)
+
+class InputRecorder(ScriptedInput):
+    def __init__(self, recording, source = None):
+        """
+        Pass keys on to the player and write down the keys of every step.
+
+        :param recording: InputRecording to append the steps to.
+        :param source: ScriptedInput to record. The keyboard if None.
+        """
+        super().__init__()
+        self.recording = recording
+        self.source = source
+
+    def advance(self, frame):
+        if self.source is None:
+            keys = pygame.key.get_pressed()
+        else:
+            self.source.advance(frame)
+            keys = self.source.get_pressed()
+
+        mask = keys_to_mask(keys)
+        self.recording.masks.append(mask)
+        self.keys = MASK_KEY_STATES[mask]
+
+class InputReplay(ScriptedInput):
+    def __init__(self, recording):
+        """
+        Press the keys of a recording again, step by step. Nothing is pressed after its last step.
+
+        :param recording: InputRecording to replay.
+        """
+        super().__init__()
+        self.recording = recording
+        self.steps_played = 0
+
+    @property
+    def finished(self):
+        return self.steps_played >= len(self.recording)
+
+    def advance(self, frame):
+        self.steps_played = frame + 1
+        self.keys = MASK_KEY_STATES[self.recording.masks[frame]] if frame < len(self.recording) else MASK_KEY_STATES[0]
@@ -0,0 +1,61 @@
+import random
+from utils.settings import *
+
+# Keys the player reacts to
+PLAYER_KEYS = (pygame.K_RIGHT, pygame.K_LEFT, pygame.K_UP, pygame.K_d, pygame.K_a, pygame.K_s)
+
+class KeyState:
+    def __init__(self, pressed = ()):
+        """
+        Stands in for the result of pygame.key.get_pressed(), for keys pressed by a script.
+
+        :param pressed: Key codes held down.
+        """
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+    def __eq__(self, other):
+        return isinstance(other, KeyState) and self.pressed == other.pressed
+
+    def __hash__(self):
+        return hash(self.pressed)
+
+class ScriptedInput:
+    """Base of the input scripts: advance(frame) picks the keys of the frame, get_pressed() hands them to the player."""
+    def __init__(self):
+        self.keys = KeyState()
+
+    def advance(self, frame):
+        pass
+
+    def get_pressed(self):
+        return self.keys
+
+class HeldInput(ScriptedInput):
+    def __init__(self, pressed):
+        """
+        Hold the same keys for the whole run.
+
+        :param pressed: Key codes held down.
+        """
+        super().__init__()
+        self.keys = KeyState(pressed)
+
+class RandomInput(ScriptedInput):
+    def __init__(self, seed = 0, hold_frames = 10):
+        """
+        Mash the player's keys at random, the same way for the same seed.
+
+        :param seed: Seed of the random generator.
+        :param hold_frames: Number of frames each random combination is held for.
+        """
+        super().__init__()
+        self.random = random.Random(seed)
+        self.hold_frames = hold_frames
+
+    def advance(self, frame):
+        if frame % self.hold_frames == 0:
+            # Lean towards running right, levels are finished on the right
+            self.keys = KeyState(key for key in PLAYER_KEYS if self.random.random() < (0.6 if key == pygame.K_RIGHT else 0.25))
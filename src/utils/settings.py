@@ -10,9 +10,21 @@ SCREEN_WIDTH = 1280
 SCREEN_HEIGHT = 720
 FPS = 60
 
+# The simulation advances in fixed steps of 1 / SIMULATION_RATE seconds, whatever the framerate
+# After a long frame, at most MAX_SIMULATION_STEPS are run to catch up, the rest of the time is dropped
+SIMULATION_RATE = 60
+SIMULATION_STEP = 1 / SIMULATION_RATE
+MAX_SIMULATION_STEPS = 5
+
 # Tile size for grid-based levels
 TILE_SIZE = 32
 
+# Cell size of the spatial index used to skip sprites outside the camera
+CULL_CELL_SIZE = 4 * TILE_SIZE
+
+# Size of the surfaces static tile layers are pre-rendered into
+CHUNK_SIZE = 512
+
 # Common colors
 BLACK        = (  0,   0,   0)
 WHITE        = (255, 255, 255)
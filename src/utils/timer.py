@@ -1,5 +1,11 @@
 from pygame.time import get_ticks
 
+# Timers read the time through get_ticks. Headless runs replace it with the simulated time,
+# so timers last the same number of steps however fast the steps are run
+def set_clock(ticks_function):
+    global get_ticks
+    get_ticks = ticks_function
+
 class Timer:
     def __init__(self, duration, func = None, repeat = False):
         self.duration = duration
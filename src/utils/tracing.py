@@ -0,0 +1,135 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+class Span:
+    __slots__ = ("tracer", "name", "category", "start")
+
+    def __init__(self, tracer, name, category):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.category, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+# Handed out while tracing is off, so a disabled span costs one attribute check and a call
+class NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Tracer:
+    def __init__(self, max_events = 500_000):
+        """
+        Record timing spans in memory and write them out as a Chrome trace-event file,
+        which chrome://tracing and ui.perfetto.dev open as a timeline.
+
+        :param max_events: Size of the event buffer. The oldest spans are dropped once it is full.
+        """
+        self.enabled = False
+        self.path = None
+        self.events = deque(maxlen = max_events)
+        self.thread_names = {}
+        self.origin = time.perf_counter_ns()
+        self.exit_hook = False
+
+    def start(self, path = "trace.json"):
+        """Start recording spans. They are written to path by stop() or flush(), or when the program exits."""
+        self.path = path
+        self.events.clear()
+        self.thread_names.clear()
+        self.enabled = True
+
+        # The menus close the game with sys.exit() themselves, so the trace is also written on the way out
+        if not self.exit_hook:
+            atexit.register(self.stop)
+            self.exit_hook = True
+
+    def stop(self):
+        """Stop recording and write out what was recorded."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self.flush()
+
+    def toggle(self, path = "trace.json"):
+        if self.enabled:
+            self.stop()
+        else:
+            self.start(path)
+
+    def span(self, name, category = "game"):
+        """Context manager timing the code inside it, e.g. with tracer.span("load level"): ..."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category)
+
+    def record(self, name, category, start, duration):
+        thread = threading.current_thread()
+        if thread.ident not in self.thread_names:
+            self.thread_names[thread.ident] = thread.name
+        self.events.append((name, category, start, duration, thread.ident))
+
+    def flush(self, path = None):
+        """
+        Write the recorded spans to a trace-event JSON file.
+
+        :param path: File to write to, the one given to start() by default.
+        :return: Path of the written file, or None if there was nothing to write.
+        """
+        path = path or self.path
+        if not path or not self.events:
+            return None
+
+        pid = os.getpid()
+        # Name the threads, so the prefetch worker shows up as such next to the main thread
+        # Snapshots, the worker may still be recording while the trace is written ( e.g. at exit during a level load )
+        trace_events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+                        for tid, thread_name in list(self.thread_names.items())]
+        # Timestamps and durations are in microseconds
+        for name, category, start, duration, tid in list(self.events):
+            trace_events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+            })
+
+        with open(path, "w") as file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file)
+        print(f"Wrote {len(self.events)} trace events to '{path}'")
+        return path
+
+# Shared by the whole game
+tracer = Tracer()
+
+def traced(name, category = "game"):
+    """Decorator putting every call of a function in a span of the shared tracer."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return function(*args, **kwargs)
+            with Span(tracer, name, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate